@@ -67,16 +67,31 @@ page = st.sidebar.selectbox(
     ["🏠 Accueil", "📊 Dashboard", "🔄 Scraping", "📈 Analyses", "🤖 IA & Prédictions", "⚙️ Outils Interactifs", "🚀 Features Avancées", "ℹ️ À propos"]
 )
 
+PROCESSED_PARQUET = 'data/processed_agro_prices.parquet'
+PROCESSED_CSV = 'data/processed_agro_prices.csv'
+RAW_PARQUET = 'data/all_agro_prices.parquet'
+RAW_CSV = 'data/all_agro_prices.csv'
+
+def read_latest(parquet_path, csv_path):
+    """Lit le fichier Parquet s'il est au moins aussi récent que le CSV, sinon le CSV"""
+    if os.path.exists(parquet_path) and (
+        not os.path.exists(csv_path)
+        or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+    ):
+        return pd.read_parquet(parquet_path, engine='pyarrow')
+    if os.path.exists(csv_path):
+        return pd.read_csv(csv_path, encoding='utf-8')
+    return None
+
 def load_data():
-    """Charge les données depuis le fichier CSV"""
+    """Charge les données traitées (Parquet si à jour, sinon CSV)"""
     try:
-        if os.path.exists('data/processed_agro_prices.csv'):
-            df = pd.read_csv('data/processed_agro_prices.csv', encoding='utf-8')
-            if 'date' in df.columns:
-                df['date'] = pd.to_datetime(df['date'])
-            return df
-        else:
+        df = read_latest(PROCESSED_PARQUET, PROCESSED_CSV)
+        if df is None:
             return None
+        if 'date' in df.columns:
+            df['date'] = pd.to_datetime(df['date'])
+        return df
     except Exception as e:
         st.error(f"Erreur lors du chargement des données: {e}")
         return None
@@ -431,7 +446,7 @@ def home_page():
                 fig = px.line(daily_avg, x='date', y='price', title='Évolution moyenne des prix')
                 st.plotly_chart(fig, use_container_width=True)
     else:
-        st.warning("📋 Aucune donnée chargée. Veuillez vérifier que le fichier data/processed_agro_prices.csv existe.")
+        st.warning("📋 Aucune donnée chargée. Veuillez vérifier que le fichier data/processed_agro_prices.parquet (ou .csv) existe.")
     
     col1, col2 = st.columns([2, 1])
     
@@ -464,7 +479,7 @@ def home_page():
         ### 🛠️ Technologies utilisées
         
         - **Python** pour le scraping et l'analyse
-        - **BeautifulSoup** pour l'extraction web
+        - **lxml** pour l'extraction web
         - **Pandas** pour la manipulation de données
         - **Plotly** pour les visualisations
         - **Streamlit** pour l'interface web
@@ -721,7 +736,7 @@ def scraping_page():
             with st.spinner("Scraping en cours..."):
                 try:
                     scraper = AgroDataScraper()
-                    all_data = []
+                    all_data = scraper.new_columns()
                     
                     for category in selected_categories:
                         st.write(f"Scraping de la catégorie: {category}")
@@ -729,21 +744,21 @@ def scraping_page():
                         
                         # Simulation du scraping (à remplacer par le vrai code)
                         category_data = scraper.scrape_category(category, category_url)
-                        all_data.extend(category_data)
+                        scraper.extend_columns(all_data, category_data)
                     
-                    if all_data:
+                    if all_data['product']:
                         # Sauvegarde des données
                         df = pd.DataFrame(all_data)
-                        df.to_csv('data/all_agro_prices.csv', index=False, encoding='utf-8')
+                        scraper.save_data(all_data, RAW_PARQUET)
                         
-                        st.success(f"Scraping terminé! {len(all_data)} enregistrements collectés.")
+                        st.success(f"Scraping terminé! {len(df)} enregistrements collectés.")
                         
                         # Traitement des données
                         with st.spinner("Traitement des données..."):
                             processor = AgroDataProcessor()
                             processed_df = processor.clean_data(df)
                             enriched_df = processor.add_derived_features(processed_df)
-                            enriched_df.to_csv('data/processed_agro_prices.csv', index=False, encoding='utf-8')
+                            processor.save_processed_data(enriched_df, PROCESSED_PARQUET)
                         
                         st.success("Données traitées et sauvegardées!")
                     else:
@@ -756,9 +771,9 @@ def scraping_page():
         st.subheader("📊 Statistiques du scraping")
         
         # Affichage des statistiques si les données existent
-        if os.path.exists('data/all_agro_prices.csv'):
+        if os.path.exists(RAW_PARQUET) or os.path.exists(RAW_CSV):
             try:
-                df = pd.read_csv('data/all_agro_prices.csv', encoding='utf-8')
+                df = read_latest(RAW_PARQUET, RAW_CSV)
                 
                 st.metric("Total enregistrements", len(df))
                 
@@ -1260,7 +1275,7 @@ def about_page():
     
     ### Backend
     - **Python 3.8+**
-    - **BeautifulSoup4** : Parsing HTML
+    - **lxml** : Parsing HTML
     - **Requests** : Requêtes HTTP
     - **Pandas** : Manipulation de données
     - **NumPy** : Calculs numériques
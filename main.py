@@ -15,6 +15,9 @@ from scraper import AgroDataScraper
 from data_processor import AgroDataProcessor
 from visualizations import AgroDataVisualizer
 
+RAW_PARQUET = 'data/all_agro_prices.parquet'
+RAW_CSV = 'data/all_agro_prices.csv'
+
 def run_full_pipeline():
     """Exécute le pipeline complet de scraping à visualisation"""
     print("🚀 Démarrage du pipeline complet de scraping agroalimentaire")
@@ -34,21 +37,21 @@ def run_full_pipeline():
             'Beurre_Oeuf_Fromage': 'https://rnm.franceagrimer.fr/prix?BEURRE-OEUF-FROMAGE'
         }
         
-        all_results = []
+        all_results = scraper.new_columns()
         
         for category_name, category_url in categories.items():
             print(f"  📂 Scraping de la catégorie: {category_name}")
             category_data = scraper.scrape_category(category_name, category_url)
-            all_results.extend(category_data)
+            scraper.extend_columns(all_results, category_data)
             
             # Sauvegarde intermédiaire
-            if category_data:
-                scraper.save_data(category_data, f'data/{category_name.lower()}_prices.csv')
+            if category_data['product']:
+                scraper.save_data(category_data, f'data/{category_name.lower()}_prices.parquet')
         
         # Sauvegarde finale
-        if all_results:
-            scraper.save_data(all_results, 'data/all_agro_prices.csv')
-            print(f"  ✅ Scraping terminé: {len(all_results)} enregistrements collectés")
+        if all_results['product']:
+            scraper.save_data(all_results, RAW_PARQUET)
+            print(f"  ✅ Scraping terminé: {len(all_results['product'])} enregistrements collectés")
         else:
             print("  ❌ Aucune donnée collectée")
             return False
@@ -65,7 +68,7 @@ def run_full_pipeline():
         processor = AgroDataProcessor()
         
         # Chargement et nettoyage
-        df = processor.load_data('data/all_agro_prices.csv')
+        df = processor.load_data(RAW_PARQUET)
         if df.empty:
             print("  ❌ Aucune donnée à traiter")
             return False
@@ -74,7 +77,7 @@ def run_full_pipeline():
         enriched_df = processor.add_derived_features(clean_df)
         
         # Sauvegarde
-        processor.save_processed_data(enriched_df, 'data/processed_agro_prices.csv')
+        processor.save_processed_data(enriched_df, 'data/processed_agro_prices.parquet')
         
         # Statistiques
         stats = processor.generate_summary_stats(enriched_df)
@@ -93,7 +96,7 @@ def run_full_pipeline():
     print("-" * 30)
     
     try:
-        visualizer = AgroDataVisualizer()
+        visualizer = AgroDataVisualizer('data/processed_agro_prices.parquet')
         plots = visualizer.generate_all_plots()
         
         successful_plots = sum(1 for plot in plots.values() if plot is not None)
@@ -164,16 +167,16 @@ def run_scraping_only():
             'Beurre_Oeuf_Fromage': 'https://rnm.franceagrimer.fr/prix?BEURRE-OEUF-FROMAGE'
         }
         
-        all_results = []
+        all_results = scraper.new_columns()
         
         for category_name, category_url in categories.items():
             print(f"Scraping de: {category_name}")
             category_data = scraper.scrape_category(category_name, category_url)
-            all_results.extend(category_data)
+            scraper.extend_columns(all_results, category_data)
         
-        if all_results:
-            scraper.save_data(all_results, 'data/all_agro_prices.csv')
-            print(f"✅ {len(all_results)} enregistrements collectés")
+        if all_results['product']:
+            scraper.save_data(all_results, RAW_PARQUET)
+            print(f"✅ {len(all_results['product'])} enregistrements collectés")
         else:
             print("❌ Aucune donnée collectée")
             
@@ -187,7 +190,9 @@ def run_processing_only():
     try:
         processor = AgroDataProcessor()
         
-        df = processor.load_data('data/all_agro_prices.csv')
+        # Données brutes scrapées (Parquet) ou, à défaut, données de démonstration (CSV)
+        raw_path = RAW_PARQUET if os.path.exists(RAW_PARQUET) else RAW_CSV
+        df = processor.load_data(raw_path)
         if df.empty:
             print("❌ Aucune donnée à traiter")
             return
@@ -195,7 +200,7 @@ def run_processing_only():
         clean_df = processor.clean_data(df)
         enriched_df = processor.add_derived_features(clean_df)
         
-        processor.save_processed_data(enriched_df, 'data/processed_agro_prices.csv')
+        processor.save_processed_data(enriched_df, 'data/processed_agro_prices.parquet')
         
         stats = processor.generate_summary_stats(enriched_df)
         print("📊 Statistiques:")
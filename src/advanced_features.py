@@ -1,38 +1,156 @@
+import os
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from sklearn.ensemble import IsolationForest
-from sklearn.cluster import KMeans
+from sklearn.cluster import MiniBatchKMeans
 from sklearn.preprocessing import StandardScaler
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import json
 import io
 import base64
 
+# Isolation Forest sur GPU (cuML) si disponible, uniquement sur demande explicite (AGRO_USE_GPU=1)
+_USE_GPU = os.environ.get('AGRO_USE_GPU') == '1'
+if _USE_GPU:
+    try:
+        import cupy
+        from cuml.ensemble import IsolationForest as GPUIsolationForest
+    except ImportError:
+        _USE_GPU = False
+
+# Seuils et libellés des catégorisations (bornes croissantes, libellés du plus bas au plus haut)
+_SENTIMENT_BINS = np.array([30, 50, 70])
+_SENTIMENT_LABELS = np.array([
+    "🔴 Très faible - Éviter",
+    "🟠 Faible - Prudence",
+    "🟡 Modéré - Surveillance",
+    "🟢 Fort - Achat recommandé"
+])
+
+_ELASTICITY_BINS = np.array([0.2, 0.5, 0.8])
+_ELASTICITY_LABELS = np.array(["Inélastique", "Peu élastique", "Élastique", "Très élastique"])
+
+_SENSITIVITY_BINS = np.array([0.4, 0.7])
+_SENSITIVITY_LABELS = np.array(["🟢 Peu sensible", "🟡 Sensible", "🔴 Très sensible"])
+
+_RISK_LEVEL_BINS = np.array([0.6, 0.8])
+_RISK_LEVEL_LABELS = np.array(["🔴 Élevé", "🟡 Moyen", "🟢 Faible"])
+
+_WEIGHT_BINS = np.array([0.5, 1.0, 1.5])
+_WEIGHT_LABELS = np.array([
+    "📉 Faible (0-5%)",
+    "⚖️ Équilibré (5-10%)",
+    "📈 Modéré (10-15%)",
+    "🔥 Fort (15-20%)"
+])
+
+_RISK_CATEGORY_BINS = np.array([0.1, 0.2, 0.3])
+_RISK_CATEGORY_LABELS = np.array(["🟢 Faible risque", "🟵 Modéré", "🟡 Risqué", "🔴 Très risqué"])
+
+# Nombre de jours de cotation utilisé pour annualiser rendements et volatilités
+_TRADING_DAYS = 252
+
+
+def _labels_from_bins(values, bins, labels, side='left'):
+    """Associe à chaque valeur le libellé de son intervalle en une seule recherche vectorisée.
+
+    side='left' correspond à des seuils stricts (valeur > seuil), side='right' à des
+    seuils inclusifs (valeur >= seuil). Les NaN reçoivent le libellé le plus bas.
+    """
+    values = np.asarray(values, dtype=float)
+    codes = np.searchsorted(bins, values, side=side)
+    codes = np.where(np.isnan(values), 0, codes)
+    return _scalar_or_array(labels[codes])
+
+
+def _scalar_or_array(labels):
+    """Libellé str pour une entrée scalaire, tableau de libellés sinon"""
+    labels = np.asarray(labels)
+    return labels.item() if labels.ndim == 0 else labels
+
+
+def _downcast(series, dtype):
+    """Convertit une colonne entière dérivée vers un type plus compact (sauf en présence de valeurs manquantes)"""
+    return series.astype(dtype) if series.notna().all() else series
+
+
+def _calendar_columns(dates):
+    """Jour de la semaine, semaine ISO et trimestre calculés directement depuis la colonne date"""
+    return {
+        'day_of_week': _downcast(dates.dt.dayofweek, 'int8'),
+        'week_of_year': _downcast(dates.dt.isocalendar().week, 'int16'),
+        'quarter': _downcast(dates.dt.quarter, 'int8')
+    }
+
+
+def _isolation_forest(X, contamination=0.1, random_state=42):
+    """Entraîne une Isolation Forest (GPU si activé) et retourne les labels et les scores de chaque ligne"""
+    if _USE_GPU:
+        X_gpu = cupy.asarray(X)
+        iso_forest = GPUIsolationForest(contamination=contamination, random_state=random_state)
+        labels = iso_forest.fit_predict(X_gpu)
+        scores = iso_forest.decision_function(X_gpu)
+        return cupy.asnumpy(labels), cupy.asnumpy(scores)
+    
+    iso_forest = IsolationForest(contamination=contamination, random_state=random_state)
+    labels = iso_forest.fit_predict(X)
+    return labels, iso_forest.decision_function(X)
+
+
+@st.cache_data(show_spinner=False)
+def _cluster_market_features(features_df, feature_columns):
+    """Standardise les caractéristiques des marchés et les regroupe en 4 clusters (résultat mis en cache)"""
+    X = features_df[feature_columns].values
+    X_scaled = StandardScaler().fit_transform(X)
+    
+    # K-Means par mini-lots
+    kmeans = MiniBatchKMeans(
+        n_clusters=4,
+        random_state=42,
+        n_init=3,
+        max_iter=100,
+        batch_size=min(256, len(X))
+    )
+    cluster_labels = kmeans.fit_predict(X_scaled)
+    
+    return cluster_labels, kmeans, X_scaled
+
+
 class AdvancedFeatures:
     """Fonctionnalités avancées pour un projet de niveau expert"""
     
     def __init__(self, df):
-        self.df = df.copy()
+        # Pas de copie : prepare_advanced_data construit un nouveau DataFrame qui partage les colonnes existantes
+        self.df = df
         self.prepare_advanced_data()
     
     def prepare_advanced_data(self):
         """Prépare les données pour les analyses avancées"""
         if 'date' in self.df.columns:
-            self.df['date'] = pd.to_datetime(self.df['date'])
-            self.df['day_of_week'] = self.df['date'].dt.dayofweek
-            self.df['week_of_year'] = self.df['date'].dt.isocalendar().week
-            self.df['quarter'] = self.df['date'].dt.quarter
+            dates = pd.to_datetime(self.df['date'])
+            calendar = _calendar_columns(dates)
+            columns = {col: self.df[col] for col in self.df.columns}
+            columns['date'] = dates
+            columns.update(calendar)
+            self.df = pd.DataFrame(columns, copy=False)
     
     def create_market_sentiment_analyzer(self):
         """Analyseur de sentiment du marché"""
         # Simulation d'indicateurs de sentiment
-        sentiment_data = []
+        products = self.df['product_clean'].unique()
+        n_products = len(products)
         
-        for product in self.df['product_clean'].unique():
+        sentiment_scores = np.empty(n_products)
+        volatilities = np.empty(n_products)
+        trends = np.empty(n_products)
+        stabilities = np.empty(n_products)
+        
+        for i, product in enumerate(products):
             product_data = self.df[self.df['product_clean'] == product]
             
             # Calcul de métriques de sentiment
@@ -42,18 +160,19 @@ class AdvancedFeatures:
             
             # Score de sentiment (0-100)
             sentiment_score = 50 + (price_trend * 10) - (price_volatility * 20) + (volume_stability * 5)
-            sentiment_score = max(0, min(100, sentiment_score))
-            
-            sentiment_data.append({
-                'product': product,
-                'sentiment_score': sentiment_score,
-                'volatility': price_volatility,
-                'trend': price_trend,
-                'stability': volume_stability,
-                'recommendation': self.get_sentiment_recommendation(sentiment_score)
-            })
-        
-        return pd.DataFrame(sentiment_data)
+            sentiment_scores[i] = max(0, min(100, sentiment_score))
+            volatilities[i] = price_volatility
+            trends[i] = price_trend
+            stabilities[i] = volume_stability
+        
+        return pd.DataFrame({
+            'product': products,
+            'sentiment_score': sentiment_scores,
+            'volatility': volatilities,
+            'trend': trends,
+            'stability': stabilities,
+            'recommendation': self.get_sentiment_recommendation(sentiment_scores)
+        })
     
     def calculate_price_trend(self, product_data):
         """Calcule la tendance des prix"""
@@ -74,22 +193,15 @@ class AdvancedFeatures:
         return normalized_slope
     
     def get_sentiment_recommendation(self, score):
-        """Génère une recommandation basée sur le sentiment"""
-        if score >= 70:
-            return "🟢 Fort - Achat recommandé"
-        elif score >= 50:
-            return "🟡 Modéré - Surveillance"
-        elif score >= 30:
-            return "🟠 Faible - Prudence"
-        else:
-            return "🔴 Très faible - Éviter"
+        """Génère une recommandation basée sur le sentiment (scalaire ou tableau)"""
+        return _labels_from_bins(score, _SENTIMENT_BINS, _SENTIMENT_LABELS, side='right')
     
     def create_price_anomaly_detector(self):
         """Détecteur d'anomalies de prix avec Isolation Forest"""
-        anomalies = []
+        columns = {'product': [], 'date': [], 'price': [], 'market': [], 'anomaly_score': [], 'reason': []}
         
         for product in self.df['product_clean'].unique():
-            product_data = self.df[self.df['product_clean'] == product].copy()
+            product_data = self.df[self.df['product_clean'] == product]
             
             if len(product_data) < 10:
                 continue
@@ -98,41 +210,37 @@ class AdvancedFeatures:
             features = ['price', 'month', 'day_of_week']
             X = product_data[features].values
             
-            # Standardisation
-            scaler = StandardScaler()
-            X_scaled = scaler.fit_transform(X)
-            
-            # Isolation Forest
-            iso_forest = IsolationForest(contamination=0.1, random_state=42)
-            anomaly_labels = iso_forest.fit_predict(X_scaled)
+            # Isolation Forest (découpes aléatoires entre min et max de chaque feature :
+            # insensible à l'échelle, aucune standardisation nécessaire)
+            anomaly_labels, anomaly_scores = _isolation_forest(X)
             
             # Identification des anomalies
-            product_data['is_anomaly'] = anomaly_labels == -1
-            anomaly_records = product_data[product_data['is_anomaly']]
+            is_anomaly = anomaly_labels == -1
+            anomaly_records = product_data[is_anomaly]
             
-            for _, record in anomaly_records.iterrows():
-                anomalies.append({
-                    'product': product,
-                    'date': record['date'],
-                    'price': record['price'],
-                    'market': record['market_clean'],
-                    'anomaly_score': iso_forest.decision_function(scaler.transform([record[features].values]))[0],
-                    'reason': self.get_anomaly_reason(record, product_data)
-                })
-        
-        return pd.DataFrame(anomalies)
+            columns['product'].append(np.full(len(anomaly_records), product, dtype=object))
+            columns['date'].append(anomaly_records['date'].to_numpy())
+            columns['price'].append(anomaly_records['price'].to_numpy())
+            columns['market'].append(anomaly_records['market_clean'].to_numpy())
+            columns['anomaly_score'].append(anomaly_scores[is_anomaly])
+            columns['reason'].append(self.get_anomaly_reason(anomaly_records, product_data))
+        
+        return pd.DataFrame({
+            name: np.concatenate(chunks) if chunks else []
+            for name, chunks in columns.items()
+        })
     
     def get_anomaly_reason(self, record, product_data):
-        """Détermine la raison de l'anomalie"""
+        """Détermine la raison de l'anomalie (un enregistrement ou un DataFrame d'enregistrements)"""
         price_mean = product_data['price'].mean()
         price_std = product_data['price'].std()
         
-        if record['price'] > price_mean + 2 * price_std:
-            return "Prix anormalement élevé"
-        elif record['price'] < price_mean - 2 * price_std:
-            return "Prix anormalement bas"
-        else:
-            return "Pattern inhabituel détecté"
+        price = np.asarray(record['price'], dtype=float)
+        return np.select(
+            [price > price_mean + 2 * price_std, price < price_mean - 2 * price_std],
+            ["Prix anormalement élevé", "Prix anormalement bas"],
+            default="Pattern inhabituel détecté"
+        )
     
     def create_market_clustering(self):
         """Clustering des marchés par comportement de prix"""
@@ -154,14 +262,9 @@ class AdvancedFeatures:
         
         features_df = pd.DataFrame(market_features)
         
-        # Standardisation pour le clustering
+        # Clustering mis en cache : inutile de le recalculer à chaque rendu si les marchés n'ont pas changé
         feature_columns = ['avg_price', 'price_volatility', 'product_diversity', 'observation_frequency', 'avg_price_range']
-        X = features_df[feature_columns].values
-        X_scaled = StandardScaler().fit_transform(X)
-        
-        # K-Means clustering
-        kmeans = KMeans(n_clusters=4, random_state=42)
-        cluster_labels = kmeans.fit_predict(X_scaled)
+        cluster_labels, kmeans, X_scaled = _cluster_market_features(features_df, feature_columns)
         
         features_df['cluster'] = cluster_labels
         features_df['cluster_name'] = features_df['cluster'].map({
@@ -175,9 +278,11 @@ class AdvancedFeatures:
     
     def create_price_elasticity_analyzer(self):
         """Analyseur d'élasticité des prix"""
-        elasticity_data = []
+        products = self.df['product_clean'].unique()
+        elasticities = np.empty(len(products))
+        analysed = np.zeros(len(products), dtype=bool)
         
-        for product in self.df['product_clean'].unique():
+        for i, product in enumerate(products):
             product_data = self.df[self.df['product_clean'] == product].sort_values('date')
             
             if len(product_data) < 5:
@@ -192,76 +297,75 @@ class AdvancedFeatures:
             if np.isnan(elasticity):
                 elasticity = 0
             
-            elasticity_data.append({
-                'product': product,
-                'elasticity': abs(elasticity),
-                'elasticity_category': self.get_elasticity_category(abs(elasticity)),
-                'price_sensitivity': self.get_price_sensitivity(abs(elasticity))
-            })
-        
-        return pd.DataFrame(elasticity_data)
+            elasticities[i] = abs(elasticity)
+            analysed[i] = True
+        
+        elasticities = elasticities[analysed]
+        return pd.DataFrame({
+            'product': products[analysed],
+            'elasticity': elasticities,
+            'elasticity_category': self.get_elasticity_category(elasticities),
+            'price_sensitivity': self.get_price_sensitivity(elasticities)
+        })
     
     def get_elasticity_category(self, elasticity):
-        """Catégorise l'élasticité"""
-        if elasticity > 0.8:
-            return "Très élastique"
-        elif elasticity > 0.5:
-            return "Élastique"
-        elif elasticity > 0.2:
-            return "Peu élastique"
-        else:
-            return "Inélastique"
+        """Catégorise l'élasticité (scalaire ou tableau)"""
+        return _labels_from_bins(elasticity, _ELASTICITY_BINS, _ELASTICITY_LABELS)
     
     def get_price_sensitivity(self, elasticity):
-        """Détermine la sensibilité au prix"""
-        if elasticity > 0.7:
-            return "🔴 Très sensible"
-        elif elasticity > 0.4:
-            return "🟡 Sensible"
-        else:
-            return "🟢 Peu sensible"
+        """Détermine la sensibilité au prix (scalaire ou tableau)"""
+        return _labels_from_bins(elasticity, _SENSITIVITY_BINS, _SENSITIVITY_LABELS)
     
     def create_real_time_monitoring(self):
         """Simulation de monitoring en temps réel"""
         # Données simulées pour le monitoring
-        current_data = []
+        products = self.df['product_clean'].unique()[:10]  # Top 10 produits
+        current_prices = np.empty(len(products))
+        price_changes = np.empty(len(products))
+        last_updates = np.empty(len(products), dtype='datetime64[ns]')
+        has_data = np.zeros(len(products), dtype=bool)
         
-        for product in self.df['product_clean'].unique()[:10]:  # Top 10 produits
+        for i, product in enumerate(products):
             product_data = self.df[self.df['product_clean'] == product].tail(7)  # 7 derniers jours
             
+            # Produit sans ligne (ex. libellé manquant) : ignoré
             if len(product_data) > 0:
                 current_price = product_data.iloc[-1]['price']
                 prev_price = product_data.iloc[-2]['price'] if len(product_data) > 1 else current_price
                 
-                price_change = ((current_price - prev_price) / prev_price) * 100 if prev_price != 0 else 0
-                
-                current_data.append({
-                    'product': product,
-                    'current_price': current_price,
-                    'price_change': price_change,
-                    'trend': '📈' if price_change > 0 else '📉' if price_change < 0 else '➡️',
-                    'status': self.get_price_status(price_change),
-                    'last_update': product_data.iloc[-1]['date']
-                })
-        
-        return pd.DataFrame(current_data)
+                current_prices[i] = current_price
+                price_changes[i] = ((current_price - prev_price) / prev_price) * 100 if prev_price != 0 else 0
+                last_updates[i] = product_data.iloc[-1]['date']
+                has_data[i] = True
+        
+        products, current_prices = products[has_data], current_prices[has_data]
+        price_changes, last_updates = price_changes[has_data], last_updates[has_data]
+        return pd.DataFrame({
+            'product': products,
+            'current_price': current_prices,
+            'price_change': price_changes,
+            'trend': np.select([price_changes > 0, price_changes < 0], ['📈', '📉'], default='➡️'),
+            'status': self.get_price_status(price_changes),
+            'last_update': last_updates
+        })
     
     def get_price_status(self, change):
-        """Détermine le statut du prix"""
-        if change > 5:
-            return "🔴 Hausse forte"
-        elif change > 2:
-            return "🟡 Hausse modérée"
-        elif change < -5:
-            return "🟢 Baisse forte"
-        elif change < -2:
-            return "🔵 Baisse modérée"
-        else:
-            return "⚪ Stable"
+        """Détermine le statut du prix (scalaire ou tableau)"""
+        # Seuils stricts des deux côtés de zéro : np.select plutôt qu'une recherche par intervalles
+        change = np.asarray(change, dtype=float)
+        return _scalar_or_array(np.select(
+            [change > 5, change > 2, change < -5, change < -2],
+            ["🔴 Hausse forte", "🟡 Hausse modérée", "🟢 Baisse forte", "🔵 Baisse modérée"],
+            default="⚪ Stable"
+        ))
     
     def create_predictive_dashboard(self):
         """Tableau de bord prédictif avancé"""
-        predictions = []
+        days_ahead = np.arange(1, 8)  # Prédiction pour les 7 prochains jours
+        confidence = np.maximum(0.5, 1.0 - (days_ahead * 0.1))  # Confiance décroissante
+        
+        predicted_products = []
+        predicted_prices = []
         
         for product in self.df['product_clean'].unique()[:15]:  # Top 15 produits
             product_data = self.df[self.df['product_clean'] == product].sort_values('date')
@@ -273,89 +377,109 @@ class AdvancedFeatures:
             recent_prices = product_data.tail(10)['price'].values
             trend = np.polyfit(range(len(recent_prices)), recent_prices, 1)[0]
             
-            # Prédiction pour les 7 prochains jours
             last_price = recent_prices[-1]
-            for day in range(1, 8):
-                predicted_price = last_price + (trend * day)
-                confidence = max(0.5, 1.0 - (day * 0.1))  # Confiance décroissante
-                
-                predictions.append({
-                    'product': product,
-                    'date_ahead': day,
-                    'predicted_price': max(0.1, predicted_price),
-                    'confidence': confidence,
-                    'risk_level': self.get_risk_level(confidence)
-                })
-        
-        return pd.DataFrame(predictions)
+            predicted_products.append(product)
+            predicted_prices.append(np.maximum(0.1, last_price + (trend * days_ahead)))
+        
+        n_products = len(predicted_products)
+        return pd.DataFrame({
+            'product': np.repeat(np.array(predicted_products, dtype=object), len(days_ahead)),
+            'date_ahead': np.tile(days_ahead, n_products),
+            'predicted_price': np.concatenate(predicted_prices) if predicted_prices else np.empty(0),
+            'confidence': np.tile(confidence, n_products),
+            'risk_level': self.get_risk_level(np.tile(confidence, n_products))
+        })
     
     def get_risk_level(self, confidence):
-        """Détermine le niveau de risque"""
-        if confidence >= 0.8:
-            return "🟢 Faible"
-        elif confidence >= 0.6:
-            return "🟡 Moyen"
-        else:
-            return "🔴 Élevé"
+        """Détermine le niveau de risque (scalaire ou tableau)"""
+        return _labels_from_bins(confidence, _RISK_LEVEL_BINS, _RISK_LEVEL_LABELS, side='right')
     
     def create_portfolio_optimizer(self):
         """Optimiseur de portefeuille de produits"""
         # Simulation d'optimisation de portefeuille
         products = self.df['product_clean'].unique()[:20]  # Top 20 produits
         
-        portfolio_data = []
+        product_mean, product_std = self.compute_return_stats(products)
         
-        for product in products:
-            product_data = self.df[self.df['product_clean'] == product]
-            
-            # Métriques pour l'optimisation
-            avg_return = (product_data['price'].pct_change().mean() * 252)  # Annualisé
-            volatility = product_data['price'].pct_change().std() * np.sqrt(252)  # Annualisé
-            sharpe_ratio = avg_return / volatility if volatility != 0 else 0
-            
-            portfolio_data.append({
-                'product': product,
-                'expected_return': avg_return,
-                'volatility': volatility,
-                'sharpe_ratio': sharpe_ratio,
-                'weight_recommendation': self.get_weight_recommendation(sharpe_ratio),
-                'risk_category': self.get_risk_category(volatility)
-            })
-        
-        return pd.DataFrame(portfolio_data)
+        # Métriques pour l'optimisation (annualisées)
+        avg_return = product_mean * _TRADING_DAYS
+        volatility = product_std * np.sqrt(_TRADING_DAYS)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe_ratio = np.where(volatility != 0, avg_return / volatility, 0.0)
+        
+        portfolio_df = pd.DataFrame({
+            'product': products,
+            'expected_return': avg_return,
+            'volatility': volatility,
+            'sharpe_ratio': sharpe_ratio
+        })
+        portfolio_df['weight_recommendation'] = self.get_weight_recommendation(portfolio_df['sharpe_ratio'].values)
+        portfolio_df['risk_category'] = self.get_risk_category(portfolio_df['volatility'].values)
+        return portfolio_df
+    
+    def compute_return_stats(self, products):
+        """Moyenne et écart type des variations relatives de prix par produit, en une passe numpy"""
+        # Produits manquants (NaN) exclus des catégories : leurs lignes (code -1) sont écartées
+        products = pd.Index(products)
+        categories = products.dropna().unique()
+        subset = self.df[self.df['product_clean'].isin(categories)]
+        codes = pd.Categorical(subset['product_clean'], categories=categories).codes
+        
+        # Regroupement des observations par produit en conservant leur ordre d'origine
+        order = np.argsort(codes, kind='stable')
+        codes = codes[order]
+        prices = subset['price'].to_numpy(dtype=float)[order]
+        
+        # Variations relatives calculées une seule fois, uniquement entre observations d'un même produit
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.diff(prices) / prices[:-1]
+        same_product = codes[1:] == codes[:-1]
+        valid = same_product & ~np.isnan(returns)
+        return_codes = codes[1:][valid]
+        returns = returns[valid]
+        
+        n_products = len(categories)
+        counts = np.bincount(return_codes, minlength=n_products)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.bincount(return_codes, weights=returns, minlength=n_products) / counts
+            squared_dev = (returns - mean[return_codes]) ** 2
+            variance = np.bincount(return_codes, weights=squared_dev, minlength=n_products) / (counts - 1)
+        variance[counts < 2] = np.nan
+        
+        # Résultats réalignés sur products (NaN pour un produit manquant)
+        positions = categories.get_indexer(products)
+        found = positions >= 0
+        product_mean = np.full(len(products), np.nan)
+        product_std = np.full(len(products), np.nan)
+        product_mean[found] = mean[positions[found]]
+        product_std[found] = np.sqrt(variance)[positions[found]]
+        return product_mean, product_std
     
     def get_weight_recommendation(self, sharpe_ratio):
-        """Recommandation de poids dans le portefeuille"""
-        if sharpe_ratio > 1.5:
-            return "🔥 Fort (15-20%)"
-        elif sharpe_ratio > 1.0:
-            return "📈 Modéré (10-15%)"
-        elif sharpe_ratio > 0.5:
-            return "⚖️ Équilibré (5-10%)"
-        else:
-            return "📉 Faible (0-5%)"
+        """Recommandation de poids dans le portefeuille (scalaire ou tableau)"""
+        return _labels_from_bins(sharpe_ratio, _WEIGHT_BINS, _WEIGHT_LABELS)
     
     def get_risk_category(self, volatility):
-        """Catégorie de risque"""
-        if volatility > 0.3:
-            return "🔴 Très risqué"
-        elif volatility > 0.2:
-            return "🟡 Risqué"
-        elif volatility > 0.1:
-            return "🟵 Modéré"
-        else:
-            return "🟢 Faible risque"
+        """Catégorie de risque (scalaire ou tableau)"""
+        return _labels_from_bins(volatility, _RISK_CATEGORY_BINS, _RISK_CATEGORY_LABELS)
     
     def export_advanced_report(self, selected_products=None):
         """Génère un rapport avancé complet"""
-        report_data = {
-            'timestamp': datetime.now().isoformat(),
-            'market_sentiment': self.create_market_sentiment_analyzer().to_dict('records'),
-            'anomalies': self.create_price_anomaly_detector().to_dict('records'),
-            'elasticity': self.create_price_elasticity_analyzer().to_dict('records'),
-            'monitoring': self.create_real_time_monitoring().to_dict('records'),
-            'predictions': self.create_predictive_dashboard().to_dict('records'),
-            'portfolio': self.create_portfolio_optimizer().to_dict('records')
+        sections = {
+            'market_sentiment': self.create_market_sentiment_analyzer,
+            'anomalies': self.create_price_anomaly_detector,
+            'elasticity': self.create_price_elasticity_analyzer,
+            'monitoring': self.create_real_time_monitoring,
+            'predictions': self.create_predictive_dashboard,
+            'portfolio': self.create_portfolio_optimizer
         }
         
+        report_data = {'timestamp': datetime.now().isoformat()}
+        
+        # Les sections sont indépendantes et ne font que lire self.df : calcul en parallèle
+        with ThreadPoolExecutor(max_workers=len(sections)) as executor:
+            futures = {name: executor.submit(create) for name, create in sections.items()}
+            for name, future in futures.items():
+                report_data[name] = future.result().to_dict('records')
+        
         return report_data
@@ -1,18 +1,64 @@
 import pandas as pd
 import numpy as np
+import os
 import re
 from datetime import datetime
 import logging
 
+# Unités de quantité et pays reconnus, par ordre de priorité
+QUANTITY_UNITS = ['KG', 'G', 'L', 'ML', 'PIECE', 'BARQ', 'COLIS', 'PLATEAU']
+COUNTRIES = [
+    'FRANCE', 'ESPAGNE', 'MAROC', 'ITALIE', 'BELGIQUE', 'PAYS-BAS',
+    'TUNISIE', 'UE', 'U.E.', 'ALLEMAGNE', 'PORTUGAL', 'GRÈCE'
+]
+
+# Motifs de prix et de qualité, par ordre de priorité (mêmes règles que clean_price_text / extract_quality)
+_PRICE_GROUPS = ['price_eur_suffix', 'price_eur_prefix', 'price_eur_text', 'price_eur_int']
+_QUALITY_GROUPS = ['quality_cat', 'quality_extra', 'quality_bio', 'quality_caliber', 'quality_caliber_spaced']
+
+# Toutes les extractions de la description en un seul balayage. Chaque alternative est une
+# assertion avant (largeur nulle) : les correspondances peuvent se chevaucher, comme avec
+# une recherche séparée par champ.
+DESCRIPTION_FIELDS_RE = re.compile(
+    r'(?=(?P<price_eur_suffix>\d+[.,]\d+)\s*€)'
+    r'|(?=€\s*(?P<price_eur_prefix>\d+[.,]\d+))'
+    r'|(?=(?P<price_eur_text>\d+[.,]\d+)\s*EUR)'
+    r'|(?=(?P<price_eur_int>\d+)\s*€)'
+    r'|(?=(?P<quantity>\d+)\s*(?P<unit>' + '|'.join(QUANTITY_UNITS) + r'))'
+    r'|(?=(?P<origin>' + '|'.join(re.escape(country) for country in COUNTRIES) + r'))'
+    r'|(?=(?P<quality_cat>CAT\.\s*(?:I|II|III|1|2|3)))'
+    r'|(?=(?P<quality_extra>EXTRA))'
+    r'|(?=(?P<quality_bio>BIO))'
+    r'|(?=(?P<quality_caliber>\d{2}-\d{2}MM))'
+    r'|(?=(?P<quality_caliber_spaced>\d{2}-\d{2}\s*MM))',
+    re.IGNORECASE
+)
+
 class AgroDataProcessor:
+    # Colonnes produites par le scraper (seules lues dans les fichiers bruts)
+    RAW_COLUMNS = ['product', 'date', 'market', 'description', 'source_url']
+
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         logging.basicConfig(level=logging.INFO)
 
     def load_data(self, filepath):
-        """Charge les données depuis un fichier CSV"""
+        """Charge les données depuis un fichier CSV brut ou un fichier Parquet traité"""
         try:
-            df = pd.read_csv(filepath, encoding='utf-8')
+            if filepath.endswith('.parquet'):
+                df = pd.read_parquet(filepath, engine='pyarrow', memory_map=True)
+            else:
+                # Colonnes brutes présentes dans l'en-tête : une colonne absente ne bloque pas le chargement
+                header = pd.read_csv(filepath, encoding='utf-8', nrows=0).columns
+                columns = [col for col in self.RAW_COLUMNS if col in header]
+                dtypes = {'product': 'category', 'market': 'category', 'date': str}
+                df = pd.read_csv(
+                    filepath,
+                    encoding='utf-8',
+                    engine='pyarrow',
+                    usecols=columns,
+                    dtype={col: dtype for col, dtype in dtypes.items() if col in columns}
+                )
             self.logger.info(f"Données chargées: {len(df)} enregistrements depuis {filepath}")
             return df
         except Exception as e:
@@ -111,6 +157,41 @@ class AgroDataProcessor:
         
         return None
 
+    def extract_description_fields(self, descriptions):
+        """Extrait prix, quantité, unité, origine et qualité de chaque description en un seul balayage"""
+        positions = pd.RangeIndex(len(descriptions))
+        text = pd.Series(descriptions.to_numpy(), index=positions).dropna().astype(str)
+        matches = text.str.extractall(DESCRIPTION_FIELDS_RE)
+        
+        def first_by_priority(groups):
+            # Première occurrence du motif le plus prioritaire ayant trouvé une correspondance
+            result = pd.Series(index=positions[:0], dtype=object)
+            for group in groups:
+                found = matches[group].dropna().groupby(level=0).first().astype(object)
+                result = result.combine_first(found)
+            return result.reindex(positions)
+        
+        def first_by_rank(column, ranking):
+            # Correspondance de plus haut rang (puis la plus à gauche) parmi celles du champ
+            candidates = matches.loc[matches[column].notna(), ['quantity', 'unit', 'origin']].copy()
+            candidates[column] = candidates[column].str.upper()
+            candidates['rank'] = candidates[column].map({value: i for i, value in enumerate(ranking)})
+            best = candidates.sort_values('rank', kind='stable').groupby(level=0).head(1)
+            return best.droplevel(1).reindex(positions)
+        
+        quantities = first_by_rank('unit', QUANTITY_UNITS)
+        
+        prices = first_by_priority(_PRICE_GROUPS)
+        qualities = first_by_priority(_QUALITY_GROUPS)
+        
+        return pd.DataFrame({
+            'price': pd.to_numeric(prices.dropna().str.replace(',', '.')).reindex(positions),
+            'quantity': pd.to_numeric(quantities['quantity']),
+            'unit': quantities['unit'],
+            'origin': first_by_rank('origin', COUNTRIES)['origin'],
+            'quality': qualities.dropna().str.upper().reindex(positions)
+        })
+
     def clean_data(self, df):
         """Nettoie et structure les données brutes"""
         self.logger.info("Début du nettoyage des données")
@@ -118,19 +199,10 @@ class AgroDataProcessor:
         # Copie du DataFrame pour éviter les modifications inplace
         clean_df = df.copy()
         
-        # Extraction des prix
-        clean_df['price'] = clean_df['description'].apply(self.clean_price_text)
-        
-        # Extraction des quantités
-        clean_df[['quantity', 'unit']] = clean_df['description'].apply(
-            lambda x: pd.Series(self.extract_quantity(x))
-        )
-        
-        # Extraction des origines
-        clean_df['origin'] = clean_df['description'].apply(self.extract_origin)
-        
-        # Extraction des qualités
-        clean_df['quality'] = clean_df['description'].apply(self.extract_quality)
+        # Extraction des prix, quantités, origines et qualités en un seul balayage des descriptions
+        fields = self.extract_description_fields(clean_df['description'])
+        for col in ['price', 'quantity', 'unit', 'origin', 'quality']:
+            clean_df[col] = fields[col].to_numpy()
         
         # Conversion de la date
         clean_df['date'] = pd.to_datetime(clean_df['date'], format='%d-%m-%Y', errors='coerce')
@@ -254,10 +326,12 @@ class AgroDataProcessor:
         return stats
 
     def save_processed_data(self, df, filepath):
-        """Sauvegarde les données traitées"""
+        """Sauvegarde les données traitées au format Parquet (compression snappy)"""
         try:
-            df.to_csv(filepath, index=False, encoding='utf-8')
+            filepath = os.path.splitext(filepath)[0] + '.parquet'
+            df.to_parquet(filepath, engine='pyarrow', compression='snappy', index=False)
             self.logger.info(f"Données traitées sauvegardées dans {filepath}")
+            return filepath
         except Exception as e:
             self.logger.error(f"Erreur lors de la sauvegarde: {e}")
 
@@ -265,13 +339,17 @@ def main():
     processor = AgroDataProcessor()
     
     # Charge et nettoie les données
-    df = processor.load_data('data/all_agro_prices.csv')
+    # Données brutes scrapées (Parquet) ou, à défaut, données de démonstration (CSV)
+    raw_path = 'data/all_agro_prices.parquet'
+    if not os.path.exists(raw_path):
+        raw_path = 'data/all_agro_prices.csv'
+    df = processor.load_data(raw_path)
     if not df.empty:
         clean_df = processor.clean_data(df)
         enriched_df = processor.add_derived_features(clean_df)
         
         # Sauvegarde
-        processor.save_processed_data(enriched_df, 'data/processed_agro_prices.csv')
+        processor.save_processed_data(enriched_df, 'data/processed_agro_prices.parquet')
         
         # Statistiques
         stats = processor.generate_summary_stats(enriched_df)
@@ -1,7 +1,24 @@
 import pandas as pd
 import numpy as np
+import os
+import shutil
 from datetime import datetime, timedelta
-import random
+
+# Libellés de saison et de tranche de prix, indexés par code
+SEASON_LABELS = np.array(['Hiver', 'Printemps', 'Été', 'Automne'])
+PRICE_CATEGORY_LABELS = np.array(['<2€', '2-5€', '5-10€', '10-20€', '>20€'])
+
+# Code saison de chaque mois (index 0 inutilisé) et bornes des tranches de prix
+_SEASON_CODE_BY_MONTH = np.array([3, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0], dtype=np.int8)
+_PRICE_CATEGORY_BOUNDS = np.array([2, 5, 10, 20])
+
+def season_codes(months):
+    """Codes saison (index dans SEASON_LABELS) d'un tableau de mois"""
+    return _SEASON_CODE_BY_MONTH[np.asarray(months, dtype=np.intp)]
+
+def price_category_codes(prices):
+    """Codes de tranche (index dans PRICE_CATEGORY_LABELS) d'un tableau de prix"""
+    return np.searchsorted(_PRICE_CATEGORY_BOUNDS, np.asarray(prices, dtype=float), side='right')
 
 def generate_demo_data():
     """Génère des données de démonstration réalistes pour le dashboard"""
@@ -35,102 +52,117 @@ def generate_demo_data():
     # Origines
     origins = ['France', 'Espagne', 'Italie', 'Maroc', 'Belgique', 'Pays-Bas', 'Allemagne', 'Portugal']
     
-    # Génération des données
-    data = []
-    base_date = datetime.now() - timedelta(days=90)
+    # Bornes du prix de base par catégorie
+    base_price_ranges = {
+        'Légumes': (1.5, 8.0),
+        'Fruits': (2.0, 12.0),
+        'Viande': (8.0, 35.0),
+        'Produits laitiers': (2.5, 15.0)
+    }
+    
+    qualities = ['Cat. I', 'Cat. II', 'Extra', 'Bio']
+    units = ['kg', 'pièce', 'litre']
+    
+    # Génération des données : tirages vectorisés par catégorie
+    rng = np.random.default_rng()
+    base_date = pd.Timestamp(datetime.now() - timedelta(days=90))
+    
+    product_chunks, category_chunks, date_chunks, price_chunks = [], [], [], []
     
     for category, products in products_data.items():
-        for product in products:
-            # Prix de base par catégorie
-            if category == 'Légumes':
-                base_price = random.uniform(1.5, 8.0)
-            elif category == 'Fruits':
-                base_price = random.uniform(2.0, 12.0)
-            elif category == 'Viande':
-                base_price = random.uniform(8.0, 35.0)
-            else:  # Produits laitiers
-                base_price = random.uniform(2.5, 15.0)
-            
-            # Génération de plusieurs enregistrements par produit
-            for _ in range(random.randint(8, 25)):
-                # Date aléatoire dans les 90 derniers jours
-                days_offset = random.randint(0, 90)
-                date = base_date + timedelta(days=days_offset)
-                
-                # Variation de prix saisonnière et aléatoire
-                seasonal_factor = 1.0
-                if category == 'Fruits':
-                    if date.month in [6, 7, 8]:  # Été
-                        seasonal_factor = random.uniform(0.8, 1.2)
-                    elif date.month in [12, 1, 2]:  # Hiver
-                        seasonal_factor = random.uniform(1.1, 1.5)
-                
-                price_variation = random.uniform(0.85, 1.15)
-                final_price = base_price * seasonal_factor * price_variation
-                
-                # Arrondi à 2 décimales
-                final_price = round(final_price, 2)
-                
-                # Sélection aléatoire du marché et origine
-                market = random.choice(markets)
-                origin = random.choice(origins)
-                
-                # Qualité
-                qualities = ['Cat. I', 'Cat. II', 'Extra', 'Bio']
-                quality = random.choice(qualities)
-                
-                data.append({
-                    'product': product,
-                    'date': date.strftime('%Y-%m-%d'),
-                    'market': market,
-                    'description': f'{product} {quality} - {origin}',
-                    'source_url': f'https://rnm.franceagrimer.fr/prix?{product.replace(" ", "-").upper()}',
-                    'price': final_price,
-                    'quantity': random.randint(1, 10),
-                    'unit': random.choice(['kg', 'pièce', 'litre']),
-                    'origin': origin,
-                    'quality': quality,
-                    'product_clean': product.title(),
-                    'market_clean': market,
-                    'unit_price': final_price,
-                    'month': date.month,
-                    'year': date.year,
-                    'season': get_season(date.month),
-                    'product_category': category,
-                    'price_category': get_price_category(final_price)
-                })
-    
-    # Création du DataFrame
-    df = pd.DataFrame(data)
-    
-    # Mélange des données
-    df = df.sample(frac=1).reset_index(drop=True)
+        low, high = base_price_ranges[category]
+        
+        # Plusieurs enregistrements par produit, chacun autour d'un prix de base propre au produit
+        records_per_product = rng.integers(8, 26, size=len(products))
+        n_rows = records_per_product.sum()
+        base_price = np.repeat(rng.uniform(low, high, size=len(products)), records_per_product)
+        
+        # Date aléatoire dans les 90 derniers jours
+        dates = base_date + pd.to_timedelta(rng.integers(0, 91, size=n_rows), unit='D')
+        months = dates.month.to_numpy()
+        
+        # Variation de prix saisonnière et aléatoire
+        seasonal_factor = np.ones(n_rows)
+        if category == 'Fruits':
+            summer = np.isin(months, [6, 7, 8])
+            winter = np.isin(months, [12, 1, 2])
+            seasonal_factor[summer] = rng.uniform(0.8, 1.2, size=summer.sum())
+            seasonal_factor[winter] = rng.uniform(1.1, 1.5, size=winter.sum())
+        
+        price_variation = rng.uniform(0.85, 1.15, size=n_rows)
+        
+        product_chunks.append(np.repeat(products, records_per_product))
+        category_chunks.append(np.full(n_rows, category, dtype=object))
+        date_chunks.append(dates)
+        price_chunks.append(np.round(base_price * seasonal_factor * price_variation, 2))
+    
+    product = pd.Series(np.concatenate(product_chunks))
+    dates = date_chunks[0].append(date_chunks[1:])
+    price = np.concatenate(price_chunks)
+    n_rows = len(product)
+    
+    # Sélection aléatoire du marché, de l'origine, de la qualité et de l'unité
+    market = pd.Series(rng.choice(markets, size=n_rows))
+    origin = pd.Series(rng.choice(origins, size=n_rows))
+    quality = pd.Series(rng.choice(qualities, size=n_rows))
+    
+    # Création du DataFrame (colonnes textuelles répétitives en dtype category)
+    df = pd.DataFrame({
+        'product': pd.Categorical(product),
+        'date': dates.strftime('%Y-%m-%d'),
+        'market': pd.Categorical(market),
+        'description': product + ' ' + quality + ' - ' + origin,
+        'source_url': 'https://rnm.franceagrimer.fr/prix?' + product.str.replace(' ', '-').str.upper(),
+        'price': price,
+        'quantity': rng.integers(1, 11, size=n_rows),
+        'unit': rng.choice(units, size=n_rows),
+        'origin': pd.Categorical(origin),
+        'quality': pd.Categorical(quality),
+        'product_clean': pd.Categorical(product.str.title()),
+        'market_clean': pd.Categorical(market),
+        'unit_price': price,
+        'month': dates.month,
+        'year': dates.year,
+        'product_category': pd.Categorical(np.concatenate(category_chunks))
+    })
+    
+    # Saison (déc.-fév. Hiver, mars-mai Printemps, juin-août Été, sinon Automne) et tranche de prix par table
+    df['season'] = SEASON_LABELS[season_codes(df['month'])]
+    df['price_category'] = PRICE_CATEGORY_LABELS[price_category_codes(df['price'])]
+    
+    # Types numériques réduits et colonnes textuelles à faible cardinalité en category
+    df = df.astype({
+        'price': 'float32', 'unit_price': 'float32', 'quantity': 'int8', 'month': 'int8', 'year': 'int16',
+        'unit': 'category', 'season': 'category', 'price_category': 'category'
+    })
+    df = df[[
+        'product', 'date', 'market', 'description', 'source_url', 'price', 'quantity', 'unit',
+        'origin', 'quality', 'product_clean', 'market_clean', 'unit_price', 'month', 'year',
+        'season', 'product_category', 'price_category'
+    ]]
+    
+    # Mélange des données par une permutation unique
+    df = df.take(rng.permutation(len(df))).reset_index(drop=True)
     
     return df
 
-def get_season(month):
-    """Détermine la saison à partir du mois"""
-    if month in [12, 1, 2]:
-        return 'Hiver'
-    elif month in [3, 4, 5]:
-        return 'Printemps'
-    elif month in [6, 7, 8]:
-        return 'Été'
-    else:
-        return 'Automne'
+def _replace_with(path, write):
+    """Écrit un fichier via write(chemin temporaire) puis le substitue atomiquement à path"""
+    tmp_path = f'{path}.tmp'
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
-def get_price_category(price):
-    """Catégorise le prix"""
-    if price < 2:
-        return '<2€'
-    elif price < 5:
-        return '2-5€'
-    elif price < 10:
-        return '5-10€'
-    elif price < 20:
-        return '10-20€'
-    else:
-        return '>20€'
+def _link_or_copy(source, target):
+    """Lien physique de source vers target (copie si le système de fichiers ne le permet pas)"""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
 
 def save_demo_data():
     """Génère et sauvegarde les données de démonstration"""
@@ -138,9 +170,13 @@ def save_demo_data():
     
     df = generate_demo_data()
     
-    # Sauvegarde
-    df.to_csv('data/all_agro_prices.csv', index=False, encoding='utf-8')
-    df.to_csv('data/processed_agro_prices.csv', index=False, encoding='utf-8')
+    # Sauvegarde : une seule écriture CSV, le fichier brut est un lien physique vers le fichier traité (copie à défaut).
+    # Chaque fichier est d'abord écrit sous un nom temporaire puis remplacé atomiquement : aucune donnée
+    # existante n'est supprimée avant que la nouvelle version soit complète.
+    raw_path = 'data/all_agro_prices.csv'
+    processed_path = 'data/processed_agro_prices.csv'
+    _replace_with(processed_path, lambda tmp_path: df.to_csv(tmp_path, index=False, encoding='utf-8'))
+    _replace_with(raw_path, lambda tmp_path: _link_or_copy(processed_path, tmp_path))
     
     print(f"✅ {len(df)} enregistrements générés et sauvegardés")
     print(f"📊 Période: {df['date'].min()} - {df['date'].max()}")
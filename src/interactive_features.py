@@ -3,17 +3,68 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import LabelEncoder
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.inspection import permutation_importance
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
 import streamlit as st
+import hashlib
 from datetime import datetime, timedelta
 
+# Agrégations groupées déléguées à Polars (multi-cœur) sur les gros volumes, s'il est installé
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+POLARS_MIN_ROWS = 100_000
+
+# Nombre maximal de lignes de test utilisées pour l'importance par permutation
+IMPORTANCE_MAX_ROWS = 2_000
+
+# Colonnes qui déterminent le modèle entraîné (features, cible et colonnes de filtrage)
+MODEL_COLUMNS = ['month', 'year', 'price', 'product_clean', 'market_clean', 'origin', 'quality', 'season']
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _train_price_model(fingerprint, cache_key, _X, _y):
+    """Entraîne et évalue le modèle de prix (mis en cache sur l'empreinte des données et le filtre, sans hacher X et y)"""
+    # Split et entraînement
+    X_train, X_test, y_train, y_test = train_test_split(_X, _y, test_size=0.2, random_state=42)
+    
+    # Gradient boosting sur histogrammes (min_samples_leaf réduit pour les petits échantillons par produit)
+    model = HistGradientBoostingRegressor(max_iter=200, learning_rate=0.05, max_bins=255,
+                                          min_samples_leaf=5, random_state=42)
+    model.fit(X_train, y_train)
+    
+    # Évaluation
+    y_pred = model.predict(X_test)
+    mae = mean_absolute_error(y_test, y_pred)
+    r2 = r2_score(y_test, y_pred)
+    
+    # Importance des features (par permutation, le modèle n'exposant pas feature_importances_),
+    # sur un sous-échantillon plafonné du jeu de test pour rester négligeable devant l'entraînement
+    if len(X_test) > IMPORTANCE_MAX_ROWS:
+        rows = np.random.default_rng(42).choice(len(X_test), IMPORTANCE_MAX_ROWS, replace=False)
+        X_test, y_test = X_test.iloc[rows], y_test.iloc[rows]
+    importance = permutation_importance(model, X_test, y_test, n_repeats=3, random_state=42)
+    feature_importance = pd.DataFrame({
+        'feature': _X.columns,
+        'importance': importance.importances_mean
+    }).sort_values('importance', ascending=False)
+    
+    return {
+        'model': model,
+        'mae': mae,
+        'r2': r2,
+        'feature_importance': feature_importance,
+        'sample_size': len(_X)
+    }
+
+
 class InteractiveFeatures:
     """Classe pour les fonctionnalités interactives avancées"""
     
     def __init__(self, df):
+        # Copie unique : prepare_data ajoute des colonnes, les filtres ne font ensuite que lire
         self.df = df.copy()
         self.prepare_data()
     
@@ -21,64 +72,95 @@ class InteractiveFeatures:
         """Prépare les données pour les analyses avancées"""
         # Conversion des dates
         if 'date' in self.df.columns:
-            self.df['date'] = pd.to_datetime(self.df['date'])
+            self.df['date'] = pd.to_datetime(self.df['date'], format='%Y-%m-%d', cache=True)
+            
+            # Vue entière des dates pour des filtres par simple comparaison d'entiers
+            dates = self.df['date'].to_numpy()
+            self._date_unit = np.datetime_data(dates.dtype)[0]
+            self._date_i8 = dates.view(np.int64)
+            self._date_valid = ~np.isnat(dates)
         
-        # Encodage des variables catégorielles pour ML
+        # Encodage des variables catégorielles pour ML (codes du dtype category, code -> libellé conservé)
         self.label_encoders = {}
         categorical_columns = ['product_clean', 'market_clean', 'origin', 'quality', 'season']
         
         for col in categorical_columns:
             if col in self.df.columns:
-                le = LabelEncoder()
-                self.df[f'{col}_encoded'] = le.fit_transform(self.df[col].astype(str))
-                self.label_encoders[col] = le
+                cat = self.df[col].astype('category')
+                self.df[f'{col}_encoded'] = cat.cat.codes.astype(np.int32)
+                self.label_encoders[col] = dict(enumerate(cat.cat.categories))
+        
+        # Modèles déjà obtenus par (produit, marché, origine) pour cette instance
+        self._model_cache = {}
+        self._fingerprint = self._data_fingerprint()
+        
+        # Moyennes mensuelles des features encodées, calculées une fois pour les prédictions futures
+        encoded = [f'{col}_encoded' for col in categorical_columns if f'{col}_encoded' in self.df.columns]
+        if 'date' in self.df.columns:
+            self._monthly_means = self.df[encoded].groupby(self.df['date'].dt.month).mean()
+        else:
+            self._monthly_means = pd.DataFrame(columns=encoded)
+        
+        # Positions des lignes par produit, marché et origine (une seule passe chacun, sans copie des lignes)
+        self._by_product = self._group_positions('product_clean')
+        self._by_market = self._group_positions('market_clean')
+        self._by_origin = self._group_positions('origin')
+    
+    def _data_fingerprint(self):
+        """Empreinte complète des colonnes du modèle, calculée une seule fois par jeu de données"""
+        columns = [col for col in MODEL_COLUMNS if col in self.df.columns]
+        row_hashes = pd.util.hash_pandas_object(self.df[columns], index=False).to_numpy()
+        digest = hashlib.blake2b(row_hashes.tobytes(), digest_size=16)
+        digest.update(repr(columns).encode())
+        return digest.hexdigest()
+    
+    def _group_positions(self, col):
+        """Dictionnaire valeur -> positions des lignes correspondantes pour une colonne"""
+        if col not in self.df.columns:
+            return {}
+        return self.df.groupby(col, sort=False, observed=True).indices
+    
+    def _rows(self, groups, value):
+        """Lignes d'une valeur, extraites à la demande à partir de ses positions"""
+        positions = groups.get(value)
+        return self.df.iloc[:0] if positions is None else self.df.take(positions)
+    
+    def _subset(self, product=None, market=None, origin=None):
+        """Lignes d'un produit / marché / origine, via les positions précalculées"""
+        subset = self.df
+        for value, groups, col in ((product, self._by_product, 'product_clean'),
+                                   (market, self._by_market, 'market_clean'),
+                                   (origin, self._by_origin, 'origin')):
+            if value:
+                if subset is self.df:
+                    subset = self._rows(groups, value)
+                else:
+                    subset = subset[subset[col] == value]
+        return subset
     
     def price_prediction_model(self, product=None, market=None, origin=None):
         """Modèle de prédiction des prix"""
         try:
+            cache_key = (product, market, origin)
+            if cache_key in self._model_cache:
+                return self._model_cache[cache_key], None
+            
             # Préparation des données
             features = ['month', 'year', 'product_clean_encoded', 'market_clean_encoded', 
                        'origin_encoded', 'quality_encoded', 'season_encoded']
             
             # Filtrage si spécifié
-            df_filtered = self.df.copy()
-            if product:
-                df_filtered = df_filtered[df_filtered['product_clean'] == product]
-            if market:
-                df_filtered = df_filtered[df_filtered['market_clean'] == market]
-            if origin:
-                df_filtered = df_filtered[df_filtered['origin'] == origin]
+            df_filtered = self._subset(product, market, origin)
             
             if len(df_filtered) < 10:
                 return None, "Pas assez de données pour l'entraînement"
             
-            X = df_filtered[features]
-            y = df_filtered['price']
-            
-            # Split et entraînement
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-            
-            model = RandomForestRegressor(n_estimators=100, random_state=42)
-            model.fit(X_train, y_train)
-            
-            # Évaluation
-            y_pred = model.predict(X_test)
-            mae = mean_absolute_error(y_test, y_pred)
-            r2 = r2_score(y_test, y_pred)
-            
-            # Importance des features
-            feature_importance = pd.DataFrame({
-                'feature': features,
-                'importance': model.feature_importances_
-            }).sort_values('importance', ascending=False)
-            
-            return {
-                'model': model,
-                'mae': mae,
-                'r2': r2,
-                'feature_importance': feature_importance,
-                'sample_size': len(df_filtered)
-            }, None
+            # Entraînement mis en cache au niveau du module sur (empreinte, filtre) : partagé entre
+            # instances et rendus Streamlit, sans que Streamlit ne hache X et y
+            self._model_cache[cache_key] = _train_price_model(
+                self._fingerprint, cache_key, df_filtered[features], df_filtered['price']
+            )
+            return self._model_cache[cache_key], None
             
         except Exception as e:
             return None, f"Erreur lors de l'entraînement: {str(e)}"
@@ -96,27 +178,23 @@ class InteractiveFeatures:
             last_date = self.df['date'].max()
             future_dates = [last_date + timedelta(days=i) for i in range(1, days_ahead + 1)]
             
-            predictions = []
-            for date in future_dates:
-                # Caractéristiques moyennes pour la prédiction
-                avg_features = self.df[self.df['date'].dt.month == date.month].mean(numeric_only=True)
-                
-                # Création des features pour la prédiction
-                pred_features = pd.DataFrame([{
-                    'month': date.month,
-                    'year': date.year,
-                    'product_clean_encoded': avg_features.get('product_clean_encoded', 0),
-                    'market_clean_encoded': avg_features.get('market_clean_encoded', 0),
-                    'origin_encoded': avg_features.get('origin_encoded', 0),
-                    'quality_encoded': avg_features.get('quality_encoded', 0),
-                    'season_encoded': avg_features.get('season_encoded', 0)
-                }])
-                
-                pred_price = model.predict(pred_features)[0]
-                predictions.append({
-                    'date': date.strftime('%Y-%m-%d'),
-                    'predicted_price': round(pred_price, 2)
-                })
+            # Caractéristiques moyennes du mois de chaque date, prédites en un seul lot
+            months = [date.month for date in future_dates]
+            encoded_features = ['product_clean_encoded', 'market_clean_encoded', 'origin_encoded',
+                                'quality_encoded', 'season_encoded']
+            avg_features = self._monthly_means.reindex(months)
+            pred_features = pd.DataFrame({
+                'month': months,
+                'year': [date.year for date in future_dates],
+                **{f: avg_features[f].to_numpy() if f in avg_features.columns else np.zeros(len(months))
+                   for f in encoded_features}
+            })
+            
+            pred_prices = model.predict(pred_features)
+            predictions = [
+                {'date': date.strftime('%Y-%m-%d'), 'predicted_price': round(pred_price, 2)}
+                for date, pred_price in zip(future_dates, pred_prices)
+            ]
             
             return predictions, None
             
@@ -135,12 +213,7 @@ class InteractiveFeatures:
     
     def get_price_evolution_data(self, product, market=None, origin=None):
         """Données d'évolution des prix pour un produit"""
-        df_filtered = self.df[self.df['product_clean'] == product].copy()
-        
-        if market:
-            df_filtered = df_filtered[df_filtered['market_clean'] == market]
-        if origin:
-            df_filtered = df_filtered[df_filtered['origin'] == origin]
+        df_filtered = self._subset(product, market, origin)
         
         # Agrégation par date
         evolution = df_filtered.groupby('date').agg({
@@ -152,25 +225,59 @@ class InteractiveFeatures:
         
         return evolution.sort_values('date')
     
+    def _use_polars(self):
+        """Indique si les agrégations doivent passer par Polars"""
+        return pl is not None and len(self.df) >= POLARS_MIN_ROWS
+    
+    def _polars_group_stats(self, keys, columns, aggregations):
+        """Agrégation groupée Polars, rendue en DataFrame pandas indexé et trié par les clés"""
+        frame = (
+            pl.from_pandas(self.df[keys + columns])
+            .with_columns(pl.col(keys).cast(pl.String))
+            .drop_nulls(keys)
+        )
+        return frame.group_by(keys).agg(aggregations).sort(keys).to_pandas().set_index(keys)
+    
     def create_market_analysis(self):
         """Analyse comparative des marchés"""
-        market_stats = self.df.groupby('market_clean').agg({
-            'price': ['mean', 'std', 'min', 'max', 'count'],
-            'product_clean': 'nunique'
-        }).round(2)
+        if self._use_polars():
+            market_stats = self._polars_group_stats(['market_clean'], ['price', 'product_clean'], [
+                pl.col('price').mean().alias('prix_moyen'),
+                pl.col('price').std().alias('prix_ecart_type'),
+                pl.col('price').min().alias('prix_min'),
+                pl.col('price').max().alias('prix_max'),
+                pl.col('price').count().alias('nombre_observations'),
+                pl.col('product_clean').drop_nulls().n_unique().alias('nombre_produits')
+            ]).round(2)
+        else:
+            market_stats = self.df.groupby('market_clean', sort=False, observed=True).agg(
+                prix_moyen=('price', 'mean'),
+                prix_ecart_type=('price', 'std'),
+                prix_min=('price', 'min'),
+                prix_max=('price', 'max'),
+                nombre_observations=('price', 'count'),
+                nombre_produits=('product_clean', 'nunique')
+            ).round(2)
         
-        market_stats.columns = ['prix_moyen', 'prix_ecart_type', 'prix_min', 'prix_max', 'nombre_observations', 'nombre_produits']
         market_stats = market_stats.sort_values('prix_moyen', ascending=False)
         
         return market_stats
     
     def create_seasonal_analysis(self):
         """Analyse saisonnière des prix"""
-        seasonal_stats = self.df.groupby(['product_clean', 'season']).agg({
-            'price': ['mean', 'std', 'count']
-        }).round(2)
+        if self._use_polars():
+            seasonal_stats = self._polars_group_stats(['product_clean', 'season'], ['price'], [
+                pl.col('price').mean().alias('prix_moyen'),
+                pl.col('price').std().alias('prix_ecart_type'),
+                pl.col('price').count().alias('nombre_observations')
+            ]).round(2)
+        else:
+            seasonal_stats = self.df.groupby(['product_clean', 'season'], observed=True).agg(
+                prix_moyen=('price', 'mean'),
+                prix_ecart_type=('price', 'std'),
+                nombre_observations=('price', 'count')
+            ).round(2)
         
-        seasonal_stats.columns = ['prix_moyen', 'prix_ecart_type', 'nombre_observations']
         seasonal_stats = seasonal_stats.reset_index()
         
         return seasonal_stats
@@ -178,8 +285,7 @@ class InteractiveFeatures:
     def create_alert_system(self, product, threshold_percent=20):
         """Système d'alertes sur les variations de prix"""
         try:
-            product_data = self.df[self.df['product_clean'] == product].copy()
-            product_data = product_data.sort_values('date')
+            product_data = self._rows(self._by_product, product).sort_values('date')
             
             if len(product_data) < 2:
                 return {"alerts": [], "message": "Pas assez de données pour l'analyse"}
@@ -187,41 +293,41 @@ class InteractiveFeatures:
             # Calcul des variations de prix
             product_data['price_change_pct'] = product_data['price'].pct_change() * 100
             
-            # Détection d'alertes
-            alerts = []
+            # Bornes IQR des prix anormalement élevés/bas
+            q25, q75 = product_data['price'].quantile([0.25, 0.75])
+            iqr = q75 - q25
+            upper, lower = q75 + 1.5 * iqr, q25 - 1.5 * iqr
             
             # Variation significative
-            significant_changes = product_data[abs(product_data['price_change_pct']) > threshold_percent]
-            for _, row in significant_changes.iterrows():
-                alerts.append({
+            significant_changes = product_data[product_data['price_change_pct'].abs() > threshold_percent]
+            alerts = [
+                {
                     'type': 'variation_significative',
-                    'date': row['date'].strftime('%Y-%m-%d'),
-                    'prix': row['price'],
-                    'variation': round(row['price_change_pct'], 2),
-                    'marche': row['market_clean'],
-                    'message': f"Variation de {abs(row['price_change_pct']):.1f}% détectée"
-                })
+                    'date': date.strftime('%Y-%m-%d'),
+                    'prix': price,
+                    'variation': round(change, 2),
+                    'marche': market,
+                    'message': f"Variation de {abs(change):.1f}% détectée"
+                }
+                for date, price, change, market in zip(
+                    significant_changes['date'], significant_changes['price'],
+                    significant_changes['price_change_pct'], significant_changes['market_clean']
+                )
+            ]
             
             # Prix anormalement élevés/bas
-            q75 = product_data['price'].quantile(0.75)
-            q25 = product_data['price'].quantile(0.25)
-            iqr = q75 - q25
-            
-            outliers = product_data[
-                (product_data['price'] > q75 + 1.5 * iqr) | 
-                (product_data['price'] < q25 - 1.5 * iqr)
+            outliers = product_data[(product_data['price'] > upper) | (product_data['price'] < lower)]
+            alerts += [
+                {
+                    'type': 'prix_eleve' if price > upper else 'prix_bas',
+                    'date': date.strftime('%Y-%m-%d'),
+                    'prix': price,
+                    'marche': market,
+                    'message': f"Prix {'élevé' if price > upper else 'bas'} détecté: {price:.2f}€"
+                }
+                for date, price, market in zip(outliers['date'], outliers['price'], outliers['market_clean'])
             ]
             
-            for _, row in outliers.iterrows():
-                alert_type = 'prix_eleve' if row['price'] > q75 + 1.5 * iqr else 'prix_bas'
-                alerts.append({
-                    'type': alert_type,
-                    'date': row['date'].strftime('%Y-%m-%d'),
-                    'prix': row['price'],
-                    'marche': row['market_clean'],
-                    'message': f"Prix {'élevé' if alert_type == 'prix_eleve' else 'bas'} détecté: {row['price']:.2f}€"
-                })
-            
             return {
                 "alerts": alerts,
                 "message": f"{len(alerts)} alerte(s) trouvée(s)",
@@ -236,34 +342,34 @@ class InteractiveFeatures:
         except Exception as e:
             return {"alerts": [], "message": f"Erreur: {str(e)}"}
     
+    def _date_bound(self, value):
+        """Borne de filtre convertie en entier dans l'unité de la colonne date"""
+        return np.datetime64(pd.to_datetime(value), self._date_unit).astype(np.int64)
+    
     def export_filtered_data(self, filters):
         """Exporte les données filtrées"""
-        df_filtered = self.df.copy()
+        # Tous les filtres combinés en un seul masque, appliqué une seule fois
+        mask = np.ones(len(self.df), dtype=bool)
         
-        # Application des filtres
-        if 'product' in filters and filters['product']:
-            df_filtered = df_filtered[df_filtered['product_clean'].isin(filters['product'])]
+        if filters.get('product'):
+            mask &= self.df['product_clean'].isin(filters['product']).to_numpy()
         
-        if 'market' in filters and filters['market']:
-            df_filtered = df_filtered[df_filtered['market_clean'].isin(filters['market'])]
+        if filters.get('market'):
+            mask &= self.df['market_clean'].isin(filters['market']).to_numpy()
         
-        if 'origin' in filters and filters['origin']:
-            df_filtered = df_filtered[df_filtered['origin'].isin(filters['origin'])]
+        if filters.get('origin'):
+            mask &= self.df['origin'].isin(filters['origin']).to_numpy()
         
-        if 'date_start' in filters and filters['date_start']:
-            # Conversion de date en datetime pour la comparaison
-            date_start = pd.to_datetime(filters['date_start'])
-            df_filtered = df_filtered[df_filtered['date'] >= date_start]
+        if filters.get('date_start'):
+            mask &= self._date_valid & (self._date_i8 >= self._date_bound(filters['date_start']))
         
-        if 'date_end' in filters and filters['date_end']:
-            # Conversion de date en datetime pour la comparaison
-            date_end = pd.to_datetime(filters['date_end'])
-            df_filtered = df_filtered[df_filtered['date'] <= date_end]
+        if filters.get('date_end'):
+            mask &= self._date_valid & (self._date_i8 <= self._date_bound(filters['date_end']))
         
-        if 'price_min' in filters and filters['price_min']:
-            df_filtered = df_filtered[df_filtered['price'] >= filters['price_min']]
+        if filters.get('price_min'):
+            mask &= (self.df['price'] >= filters['price_min']).to_numpy()
         
-        if 'price_max' in filters and filters['price_max']:
-            df_filtered = df_filtered[df_filtered['price'] <= filters['price_max']]
+        if filters.get('price_max'):
+            mask &= (self.df['price'] <= filters['price_max']).to_numpy()
         
-        return df_filtered
+        return self.df[mask]
@@ -1,26 +1,67 @@
 import requests
-from bs4 import BeautifulSoup
-import pandas as pd
+import lxml.etree
+import lxml.html
+import pyarrow as pa
+import pyarrow.parquet as pq
+import os
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from fake_useragent import UserAgent
 import logging
 from urllib.parse import urljoin, urlparse
 import re
 from datetime import datetime
 
+# Patterns de prix, dans l'ordre de priorité (compilés une seule fois)
+PRICE_PATTERNS = [
+    re.compile(r'(\d+[.,]\d+)\s*€\s*HT'),  # 12,50 € HT
+    re.compile(r'€\s*HT\s*(\d+[.,]\d+)'),  # € HT 12,50
+    re.compile(r'(\d+)\s*€\s*HT'),  # 12 € HT
+    re.compile(r'(\d+[.,]\d+)\s*€'),  # 12,50 €
+    re.compile(r'(\d+)\s*€'),  # 12 €
+    re.compile(r'(\d+[.,]\d+)\s*EUR'),  # 12.50 EUR
+]
+
+# Mêmes patterns fusionnés en une alternative pour un seul passage sur le texte
+PRICE_RE = re.compile(
+    r'(?P<ht>\d+[.,]\d+)\s*€\s*HT'
+    r'|€\s*HT\s*(?P<ht2>\d+[.,]\d+)'
+    r'|(?P<ht_int>\d+)\s*€\s*HT'
+    r'|(?P<with_dec>\d+[.,]\d+)\s*(?:€|EUR)'
+    r'|(?P<without_dec>\d+)\s*€'
+)
+
+DATE_RE = re.compile(r'(\d{2}-\d{2}-\d{4})')
+
+# Cellules de tableau sans cellule imbriquée, où se trouvent les prix
+PRICE_CELLS_XPATH = '//table//td[not(.//td or .//th)] | //table//th[not(.//td or .//th)]'
+
+# Colonnes des enregistrements scrapés, accumulés colonne par colonne
+SCRAPED_COLUMNS = ('product', 'date', 'market', 'description', 'source_url')
+
 class AgroDataScraper:
-    def __init__(self):
+    def __init__(self, max_workers=8, min_interval=1.0):
         self.base_url = "https://rnm.franceagrimer.fr"
-        self.session = requests.Session()
+        
+        # Toutes les requêtes visent le même serveur : un calendrier global les espace d'au moins
+        # min_interval secondes, soit au plus 1/min_interval requête par seconde quel que soit
+        # max_workers. Les threads ne font que recouvrir la latence des réponses et le parsing.
+        self.max_workers = max_workers
+        self.min_interval = min_interval
+        self._rate_lock = threading.Lock()
+        self._next_request_time = 0.0
+        # Une session HTTP par thread (requests.Session n'est pas garantie thread-safe)
+        self._local = threading.local()
         self.ua = UserAgent()
-        self.session.headers.update({
+        self.headers = {
             'User-Agent': self.ua.random,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'fr,fr-FR;q=0.8,en-US;q=0.5,en;q=0.3',
             'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
-        })
+        }
         
         logging.basicConfig(
             level=logging.INFO,
@@ -32,29 +73,69 @@ class AgroDataScraper:
         )
         self.logger = logging.getLogger(__name__)
 
+    @staticmethod
+    def new_columns():
+        """Conteneur colonnaire vide pour les enregistrements scrapés"""
+        return {col: [] for col in SCRAPED_COLUMNS}
+
+    @staticmethod
+    def extend_columns(target, data):
+        """Ajoute les enregistrements colonnaires de data à target"""
+        for col in SCRAPED_COLUMNS:
+            target[col].extend(data[col])
+        return target
+
+    def get_session(self):
+        """Session HTTP propre au thread courant, créée à la première requête"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            self._local.session = session
+        return session
+
+    def wait_rate_limit(self):
+        """Attend le prochain créneau de requête, partagé entre les threads (débit plafonné à 1/min_interval)"""
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request_time - now
+            self._next_request_time = max(now, self._next_request_time) + self.min_interval
+        
+        if wait > 0:
+            time.sleep(wait)
+
     def get_page(self, url, params=None):
         """Récupère le contenu d'une page avec gestion des erreurs"""
+        self.wait_rate_limit()
         try:
-            response = self.session.get(url, params=params, timeout=30)
+            response = self.get_session().get(url, params=params, timeout=30)
             response.raise_for_status()
-            return response.text
+            return response.content  # Octets bruts : lxml détecte lui-même l'encodage déclaré
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Erreur lors de la récupération de {url}: {e}")
             return None
 
+    def parse_html(self, html, url):
+        """Analyse une page HTML ; None si le contenu est vide ou illisible"""
+        try:
+            return lxml.html.fromstring(html)
+        except (ValueError, lxml.etree.ParserError) as e:
+            self.logger.error(f"Page illisible {url}: {e}")
+            return None
+
     def extract_product_links(self, category_url):
         """Extrait les liens des produits depuis une page de catégorie"""
         html = self.get_page(category_url)
         if not html:
             return []
         
-        soup = BeautifulSoup(html, 'html.parser')
+        tree = self.parse_html(html, category_url)
+        if tree is None:
+            return []
         product_links = []
         
         # Cherche les liens vers les produits
-        links = soup.find_all('a', href=True)
-        for link in links:
-            href = link['href']
+        for href in tree.xpath('//a/@href'):
             if '/prix?' in href and len(href.split('?')) > 1:
                 full_url = urljoin(self.base_url, href)
                 product_links.append(full_url)
@@ -67,92 +148,72 @@ class AgroDataScraper:
         if not html:
             return None
         
-        soup = BeautifulSoup(html, 'html.parser')
+        tree = self.parse_html(html, product_url)
+        if tree is None:
+            return None
         
         # Extraction du nom du produit
-        title = soup.find('h1')
-        product_name = title.get_text().strip() if title else "Inconnu"
+        title = tree.find('.//h1')
+        product_name = title.text_content().strip() if title is not None else "Inconnu"
         
         # Extraction de la date
-        date_element = soup.find('h2')
-        date_text = date_element.get_text().strip() if date_element else ""
-        date_match = re.search(r'(\d{2}-\d{2}-\d{4})', date_text)
+        date_element = tree.find('.//h2')
+        date_text = date_element.text_content().strip() if date_element is not None else ""
+        date_match = DATE_RE.search(date_text)
         date = date_match.group(1) if date_match else datetime.now().strftime('%d-%m-%Y')
         
         # Extraction des données de prix
-        price_data = []
-        
-        # Cherche tous les éléments qui pourraient contenir des prix
-        all_text = soup.get_text()
-        
-        # Patterns de prix plus robustes
-        price_patterns = [
-            r'(\d+[.,]\d+)\s*€\s*HT',  # 12,50 € HT
-            r'€\s*HT\s*(\d+[.,]\d+)',  # € HT 12,50
-            r'(\d+)\s*€\s*HT',  # 12 € HT
-            r'(\d+[.,]\d+)\s*€',  # 12,50 €
-            r'(\d+)\s*€',  # 12 €
-            r'(\d+[.,]\d+)\s*EUR',  # 12.50 EUR
-        ]
+        price_data = self.new_columns()
         
-        # Extraction des prix du texte complet
-        prices_found = []
-        for pattern in price_patterns:
-            matches = re.findall(pattern, all_text)
-            for match in matches:
-                try:
-                    price = float(match.replace(',', '.'))
-                    if 0.1 < price < 1000:  # Filtre les prix réalistes
-                        prices_found.append(price)
-                except ValueError:
-                    continue
+        # Les prix se trouvent dans les cellules des tableaux : seul leur texte est analysé
+        # (cellules feuilles uniquement ; texte complet de la page s'il n'y a aucun tableau)
+        cells = tree.xpath(PRICE_CELLS_XPATH)
+        texts = [cell.text_content() for cell in cells] if cells else [tree.text_content()]
+        
+        # Extraction des prix en un seul passage par texte
+        prices_found = [
+            float(next(group for group in match.groups() if group).replace(',', '.'))
+            for text in texts
+            for match in PRICE_RE.finditer(text)
+        ]
+        prices_found = [price for price in prices_found if 0.1 < price < 1000]  # Filtre les prix réalistes
         
         # Si on trouve des prix, on crée des enregistrements
         if prices_found:
             # Extraction des marchés
-            market_links = soup.find_all('a', href=re.compile(r'MARCHE'))
-            markets = [link.get_text().strip() for link in market_links if link.get_text().strip()]
+            market_links = tree.xpath('//a[contains(@href, "MARCHE")]')
+            markets = [link.text_content().strip() for link in market_links if link.text_content().strip()]
             
             # Si pas assez de marchés, on utilise le nom du produit comme marché
             if len(markets) < len(prices_found):
                 markets = [product_name] * len(prices_found)
             
-            # Création des enregistrements
-            for i, price in enumerate(prices_found[:len(markets)]):
-                market = markets[i] if i < len(markets) else product_name
-                
-                price_data.append({
-                    'product': product_name,
-                    'date': date,
-                    'market': market,
-                    'description': f'Prix extrait: {price}€',
-                    'source_url': product_url
-                })
+            # Création des enregistrements, un marché par prix
+            n_records = len(prices_found)
+            price_data['product'].extend([product_name] * n_records)
+            price_data['date'].extend([date] * n_records)
+            price_data['market'].extend(markets[:n_records])
+            price_data['description'].extend([f'Prix extrait: {price}€' for price in prices_found])
+            price_data['source_url'].extend([product_url] * n_records)
         
         # Si toujours pas de prix, on essaie une approche différente
-        if not price_data:
+        if not price_data['product']:
             # Cherche les tableaux qui pourraient contenir des prix
-            tables = soup.find_all('table')
-            for table in tables:
-                rows = table.find_all('tr')
-                for row in rows:
-                    cells = row.find_all(['td', 'th'])
-                    row_text = ' '.join([cell.get_text().strip() for cell in cells])
+            for table in tree.xpath('//table'):
+                for row in table.xpath('.//tr'):
+                    cells = row.xpath('.//td | .//th')
+                    row_text = ' '.join([cell.text_content().strip() for cell in cells])
                     
                     # Cherche des prix dans cette ligne
-                    for pattern in price_patterns:
-                        match = re.search(pattern, row_text)
+                    for pattern in PRICE_PATTERNS:
+                        match = pattern.search(row_text)
                         if match:
                             try:
                                 price = float(match.group(1).replace(',', '.'))
                                 if 0.1 < price < 1000:
-                                    price_data.append({
-                                        'product': product_name,
-                                        'date': date,
-                                        'market': product_name,
-                                        'description': row_text[:200],  # Limite la longueur
-                                        'source_url': product_url
-                                    })
+                                    record = (product_name, date, product_name, row_text[:200], product_url)  # Description limitée
+                                    for col, value in zip(SCRAPED_COLUMNS, record):
+                                        price_data[col].append(value)
                                     break
                             except ValueError:
                                 continue
@@ -172,29 +233,37 @@ class AgroDataScraper:
         product_links = self.extract_product_links(category_url)
         self.logger.info(f"Trouvé {len(product_links)} produits dans {category_name}")
         
-        all_data = []
+        all_data = self.new_columns()
+        product_urls = product_links[:10]  # Limite à 10 produits pour le test
         
-        for i, product_url in enumerate(product_links[:10]):  # Limite à 10 produits pour le test
+        def scrape_product(indexed_url):
+            i, product_url = indexed_url
             self.logger.info(f"Scraping du produit {i+1}/{len(product_links)}: {product_url}")
-            
-            product_data = self.extract_price_data(product_url)
-            if product_data and product_data['price_data']:
-                all_data.extend(product_data['price_data'])
-            
-            # Pause pour éviter de surcharger le serveur
-            time.sleep(1)
+            try:
+                return self.extract_price_data(product_url)
+            except Exception as e:
+                # Un produit en échec n'interrompt pas le reste de la catégorie
+                self.logger.error(f"Erreur lors du scraping de {product_url}: {e}")
+                return None
+        
+        # Téléchargements concurrents, départs limités par wait_rate_limit ; l'ordre des produits est conservé
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for product_data in executor.map(scrape_product, enumerate(product_urls)):
+                if product_data and product_data['price_data']['product']:
+                    self.extend_columns(all_data, product_data['price_data'])
         
         return all_data
 
     def save_data(self, data, filename):
-        """Sauvegarde les données dans un fichier CSV"""
-        if not data:
+        """Sauvegarde les données colonnaires au format Parquet (compression zstd)"""
+        if not data or not data['product']:
             self.logger.warning("Aucune donnée à sauvegarder")
             return
         
-        df = pd.DataFrame(data)
-        df.to_csv(filename, index=False, encoding='utf-8')
+        filename = os.path.splitext(filename)[0] + '.parquet'
+        pq.write_table(pa.table(data), filename, compression='zstd')
         self.logger.info(f"Données sauvegardées dans {filename}")
+        return filename
 
 def main():
     scraper = AgroDataScraper()
@@ -207,24 +276,24 @@ def main():
         'Beurre_Oeuf_Fromage': 'https://rnm.franceagrimer.fr/prix?BEURRE-OEUF-FROMAGE'
     }
     
-    all_results = []
+    all_results = scraper.new_columns()
     
     for category_name, category_url in categories.items():
         try:
             category_data = scraper.scrape_category(category_name, category_url)
-            all_results.extend(category_data)
+            scraper.extend_columns(all_results, category_data)
             
             # Sauvegarde intermédiaire par catégorie
-            if category_data:
-                scraper.save_data(category_data, f'data/{category_name.lower()}_prices.csv')
+            if category_data['product']:
+                scraper.save_data(category_data, f'data/{category_name.lower()}_prices.parquet')
                 
         except Exception as e:
             scraper.logger.error(f"Erreur lors du scraping de {category_name}: {e}")
     
     # Sauvegarde finale
-    if all_results:
-        scraper.save_data(all_results, 'data/all_agro_prices.csv')
-        print(f"Scraping terminé. {len(all_results)} enregistrements collectés.")
+    if all_results['product']:
+        scraper.save_data(all_results, 'data/all_agro_prices.parquet')
+        print(f"Scraping terminé. {len(all_results['product'])} enregistrements collectés.")
     else:
         print("Aucune donnée collectée.")
 
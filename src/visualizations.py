@@ -3,16 +3,54 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 from plotly.subplots import make_subplots
 import numpy as np
 import logging
 from datetime import datetime
 import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+# Nombre maximal de points tracés sur les courbes temporelles
+MAX_LINE_POINTS = 2000
+
+# Sorties du traitement : Parquet (pipeline) ou CSV (données de démonstration)
+PROCESSED_PARQUET = 'data/processed_agro_prices.parquet'
+PROCESSED_CSV = 'data/processed_agro_prices.csv'
+
+def latest_data_path(parquet_path, csv_path):
+    """Chemin du Parquet s'il est au moins aussi récent que le CSV (ou seul présent), sinon du CSV"""
+    if os.path.exists(parquet_path) and (
+        not os.path.exists(csv_path)
+        or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+    ):
+        return parquet_path
+    return csv_path
+
+# Taille minimale des données pour que le pool de processus compense son coût de démarrage
+PARALLEL_MIN_ROWS = 1_000_000
 
 class AgroDataVisualizer:
-    def __init__(self, data_path='data/processed_agro_prices.csv'):
-        self.data_path = data_path
+    # Seules colonnes utilisées par les graphiques
+    REQUIRED_COLS = ['date', 'price', 'market_clean', 'product_clean', 'origin', 'season', 'price_category']
+    # Ordre calendaire des saisons (libellés de data_processor.get_season)
+    SEASON_ORDER = ['Hiver', 'Printemps', 'Été', 'Automne']
+
+    def __init__(self, data_path=None, export_png=False, parallel=False):
+        # Par défaut : sortie traitée la plus récente (Parquet du pipeline ou CSV des données de démonstration)
+        self.data_path = data_path or latest_data_path(PROCESSED_PARQUET, PROCESSED_CSV)
+        self.export_png = export_png  # Export PNG via Kaleido (lent), désactivé par défaut : HTML seul
+        self.parallel = parallel  # Pool de processus (utile seulement sur de gros volumes), désactivé par défaut
         self.df = pd.DataFrame()
+        self._cache = {}
+        self._pending_images = None
+        self._pending_html = None
+        self._last_hash = None
+        self._last_plots = None
         self.logger = logging.getLogger(__name__)
         
         # Configuration des styles
@@ -27,20 +65,202 @@ class AgroDataVisualizer:
     def load_data(self):
         """Charge les données pour la visualisation"""
         try:
-            self.df = pd.read_csv(self.data_path, encoding='utf-8')
-            if 'date' in self.df.columns:
-                self.df['date'] = pd.to_datetime(self.df['date'])
+            stale_sidecar = None
+            if self.data_path.endswith('.parquet'):
+                self.df = self.read_parquet_columns(self.data_path)
+            else:
+                # Cache Parquet compagnon (nom distinct de la sortie Parquet du pipeline) :
+                # relu tant qu'il est au moins aussi récent que le CSV
+                sidecar_path = os.path.splitext(self.data_path)[0] + '.cache.parquet'
+                if os.path.exists(sidecar_path) and os.path.getmtime(sidecar_path) >= os.path.getmtime(self.data_path):
+                    self.df = self.read_parquet_columns(sidecar_path)
+                else:
+                    self.df = self.read_csv_threaded(self.data_path)
+                    stale_sidecar = sidecar_path
+            # Projection sur les colonnes utiles avant conversion des dates et écriture du cache
+            columns = [col for col in self.REQUIRED_COLS if col in self.df.columns]
+            if list(self.df.columns) != columns:
+                self.df = self.df[columns]
+            
+            # Dates invalides converties en NaT plutôt que de faire échouer le chargement
+            if 'date' in self.df.columns and not pd.api.types.is_datetime64_any_dtype(self.df['date']):
+                self.df['date'] = pd.to_datetime(self.df['date'], errors='coerce')
+            
+            # Copie Parquet des seules colonnes utiles, écrite avec les dates déjà typées
+            if stale_sidecar:
+                self.write_sidecar(stale_sidecar)
+            
+            # Prix en float32 contigu : moitié moins d'octets lus par les agrégations
+            if 'price' in self.df.columns:
+                price = pd.to_numeric(self.df['price'], errors='coerce').to_numpy(dtype=np.float32, na_value=np.nan)
+                self.df['price'] = np.ascontiguousarray(price)
+            
+            # Clés de regroupement en category : hachage sur les codes entiers plutôt que sur les chaînes
+            for col in ('market_clean', 'product_clean', 'origin', 'season', 'price_category'):
+                if col in self.df.columns:
+                    self.df[col] = self.df[col].astype('category')
+            # Saisons dans l'ordre calendaire (sauf libellé inconnu, conservé tel quel)
+            if 'season' in self.df.columns and set(self.df['season'].cat.categories) <= set(self.SEASON_ORDER):
+                self.df['season'] = self.df['season'].cat.set_categories(self.SEASON_ORDER, ordered=True)
+            self._cache = {}
             self.logger.info(f"Données chargées pour visualisation: {len(self.df)} enregistrements")
         except Exception as e:
             self.logger.error(f"Erreur lors du chargement des données: {e}")
 
+    def read_csv_threaded(self, path):
+        """Lit les colonnes utiles (présentes) du CSV avec le lecteur multithread de PyArrow (dates lues en texte)"""
+        header = pd.read_csv(path, encoding='utf-8', nrows=0).columns
+        table = pa_csv.read_csv(
+            path,
+            read_options=pa_csv.ReadOptions(use_threads=True, block_size=64 << 20),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=[col for col in self.REQUIRED_COLS if col in header],
+                column_types={'date': pa.string()},
+                strings_can_be_null=True
+            )
+        )
+        return table.to_pandas()
+
+    def read_parquet_columns(self, path):
+        """Lit uniquement les colonnes utiles (présentes) d'un fichier Parquet"""
+        available = pq.read_schema(path).names
+        columns = [col for col in self.REQUIRED_COLS if col in available]
+        return pd.read_parquet(path, engine='pyarrow', columns=columns)
+
+    def write_sidecar(self, sidecar_path):
+        """Écrit la copie Parquet (colonnes utiles) des données CSV pour accélérer les chargements suivants"""
+        try:
+            self.df.to_parquet(sidecar_path, engine='pyarrow', compression='snappy', index=False)
+        except Exception as e:
+            self.logger.warning(f"Impossible d'écrire le fichier Parquet {sidecar_path}: {e}")
+
+    def _precompute(self):
+        """Calcule une seule fois les agrégats partagés par les graphiques"""
+        if self._cache or self.df.empty:
+            return self._cache
+        
+        # Chaque agrégat est isolé : un échec ne fait échouer que les graphiques qui l'utilisent
+        cache = {}
+        for name, required, build in self._aggregate_builders():
+            if not all(col in self.df.columns for col in required):
+                continue
+            try:
+                value = build()
+            except Exception as e:
+                self.logger.error(f"Erreur calcul agrégat {name}: {e}")
+                continue
+            if value is not None:
+                cache[name] = value
+        
+        self._cache = cache
+        return cache
+
+    def _aggregate_builders(self):
+        """Agrégats partagés : nom, colonnes requises, fonction de calcul"""
+        df = self.df
+        return [
+            # Rééchantillonnage journalier, jours sans cotation retirés (sinon des NaN isolés
+            # rendraient invisible la courbe d'un produit peu coté)
+            ('daily_mean', ('date', 'price'),
+             lambda: df.set_index('date')['price'].resample('D').mean().dropna()),
+            ('by_market', ('market_clean', 'price'),
+             lambda: df.groupby('market_clean', observed=True, sort=False)['price'].agg(['mean', 'count'])),
+            ('by_origin', ('origin', 'price'),
+             lambda: df.groupby('origin', observed=True, sort=False)['price'].agg(['mean', 'count'])),
+            ('by_season', ('season', 'price'),
+             lambda: df.groupby('season', observed=True)['price'].agg(['mean', 'count', 'std'])),
+            # Histogramme et boîte à moustaches pré-calculés : la figure ne transporte plus chaque prix
+            ('price_histogram', ('price',), self._price_histogram),
+            ('price_box', ('price',), self._price_box),
+            # Top-K par sélection partielle (nlargest) plutôt que par tri complet des comptages
+            ('top_products', ('product_clean',),
+             lambda: df.groupby('product_clean', observed=True, sort=False).size().nlargest(10)),
+            ('top_markets', ('market_clean',),
+             lambda: df.groupby('market_clean', observed=True, sort=False).size().nlargest(8)),
+            ('price_category_vc', ('price_category',),
+             lambda: df['price_category'].value_counts()),
+        ]
+
+    def _valid_prices(self):
+        """Prix renseignés (sans NaN)"""
+        prices = self.df['price'].to_numpy()
+        return prices[~np.isnan(prices)]
+
+    def _price_histogram(self):
+        """Comptages et bornes de 50 classes de prix (None sans prix)"""
+        prices = self._valid_prices()
+        return np.histogram(prices, bins=50) if prices.size else None
+
+    def _price_box(self):
+        """Quartiles et moustaches (1,5 IQR) des prix (None sans prix)"""
+        prices = self._valid_prices()
+        if not prices.size:
+            return None
+        q1, median, q3 = np.percentile(prices, [25, 50, 75])
+        iqr = q3 - q1
+        return {
+            'q1': q1, 'median': median, 'q3': q3,
+            'lowerfence': prices[prices >= q1 - 1.5 * iqr].min(),
+            'upperfence': prices[prices <= q3 + 1.5 * iqr].max(),
+        }
+
+    def _data_hash(self):
+        """Empreinte des données chargées (et du mode d'export) pour réutiliser les graphiques"""
+        row_hashes = pd.util.hash_pandas_object(self.df, index=False).to_numpy()
+        digest = hashlib.blake2b(row_hashes.tobytes(), digest_size=16)
+        digest.update(repr((list(self.df.columns), self.export_png)).encode())
+        return digest.digest()
+
+    def _category_mask(self, col, values):
+        """Masque booléen des lignes dont la catégorie appartient à values (lecture directe par code)"""
+        categories = self.df[col].cat.categories
+        # Case supplémentaire à False : le code -1 (valeur manquante) y tombe
+        keep = np.zeros(len(categories) + 1, dtype=bool)
+        keep[categories.get_indexer(values)] = True
+        keep[-1] = False
+        return keep[self.df[col].cat.codes.to_numpy()]
+
+    def _save_figure(self, fig, name):
+        """Sauvegarde un graphique en HTML et en PNG (écritures différées pendant generate_all_plots)"""
+        html_path = f'static/plots/{name}.html'
+        if self._pending_html is not None:
+            self._pending_html.append(html_path)
+        else:
+            fig.write_html(html_path)
+        if not self.export_png:
+            return
+        
+        png_path = f'static/plots/{name}.png'
+        if self._pending_images is not None:
+            self._pending_images.append((fig, png_path))
+        else:
+            fig.write_image(png_path)
+
+    def _export_images(self, pending):
+        """Exporte les PNG en attente avec une seule session Kaleido"""
+        if not pending:
+            return
+        
+        try:
+            if hasattr(pio, 'write_images'):
+                # Kaleido >= 1 : un seul navigateur pour toutes les figures
+                pio.write_images([fig for fig, _ in pending], [path for _, path in pending])
+            else:
+                # Kaleido 0.x : le processus de rendu est persistant et réutilisé d'une figure à l'autre
+                for fig, path in pending:
+                    fig.write_image(path)
+            self.logger.info(f"{len(pending)} images PNG exportées")
+        except Exception as e:
+            self.logger.error(f"Erreur lors de l'export des images PNG: {e}")
+
     def create_price_evolution_plot(self):
         """Crée un graphique de l'évolution des prix dans le temps"""
         if self.df.empty or 'price' not in self.df.columns:
             return None
         
-        # Prix moyens par date
-        daily_prices = self.df.groupby('date')['price'].mean().reset_index()
+        # Prix moyens par jour, décimés au-delà de MAX_LINE_POINTS points
+        daily_prices = self._precompute()['daily_mean']
+        daily_prices = daily_prices.iloc[::max(1, len(daily_prices) // MAX_LINE_POINTS)].reset_index()
         
         fig = px.line(
             daily_prices, 
@@ -58,8 +278,7 @@ class AgroDataVisualizer:
         )
         
         # Sauvegarde
-        fig.write_html('static/plots/price_evolution.html')
-        fig.write_image('static/plots/price_evolution.png')
+        self._save_figure(fig, 'price_evolution')
         
         return fig
 
@@ -72,25 +291,32 @@ class AgroDataVisualizer:
             rows=2, cols=2,
             subplot_titles=('Distribution des prix', 'Boîte à moustaches', 
                           'Histogramme par catégorie', 'Top 10 produits'),
-            specs=[[{"type": "histogram"}, {"type": "box"}],
+            specs=[[{"type": "bar"}, {"type": "box"}],
                    [{"type": "bar"}, {"type": "bar"}]]
         )
         
-        # Histogramme
-        fig.add_trace(
-            go.Histogram(x=self.df['price'], name='Distribution des prix'),
-            row=1, col=1
-        )
+        # Histogramme (classes calculées avec NumPy)
+        if 'price_histogram' in self._precompute():
+            counts, edges = self._precompute()['price_histogram']
+            fig.add_trace(
+                go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges),
+                      name='Distribution des prix'),
+                row=1, col=1
+            )
         
-        # Boîte à moustaches
-        fig.add_trace(
-            go.Box(y=self.df['price'], name='Boîte à moustaches'),
-            row=1, col=2
-        )
+        # Boîte à moustaches (quartiles et moustaches pré-calculés)
+        if 'price_box' in self._precompute():
+            box = self._precompute()['price_box']
+            fig.add_trace(
+                go.Box(q1=[box['q1']], median=[box['median']], q3=[box['q3']],
+                       lowerfence=[box['lowerfence']], upperfence=[box['upperfence']],
+                       name='Boîte à moustaches'),
+                row=1, col=2
+            )
         
         # Distribution par catégorie de prix
         if 'price_category' in self.df.columns:
-            category_counts = self.df['price_category'].value_counts()
+            category_counts = self._precompute()['price_category_vc']
             fig.add_trace(
                 go.Bar(x=category_counts.index, y=category_counts.values, name='Par catégorie'),
                 row=2, col=1
@@ -98,7 +324,7 @@ class AgroDataVisualizer:
         
         # Top 10 des produits
         if 'product_clean' in self.df.columns:
-            top_products = self.df['product_clean'].value_counts().head(10)
+            top_products = self._precompute()['top_products']
             fig.add_trace(
                 go.Bar(x=top_products.values, y=top_products.index, 
                       orientation='h', name='Top 10 produits'),
@@ -111,8 +337,7 @@ class AgroDataVisualizer:
             showlegend=False
         )
         
-        fig.write_html('static/plots/price_distribution.html')
-        fig.write_image('static/plots/price_distribution.png')
+        self._save_figure(fig, 'price_distribution')
         
         return fig
 
@@ -121,15 +346,15 @@ class AgroDataVisualizer:
         if self.df.empty or 'price' not in self.df.columns:
             return None
         
-        # Prix moyens par marché
-        market_prices = self.df.groupby('market_clean')['price'].agg(['mean', 'count']).reset_index()
-        market_prices = market_prices[market_prices['count'] >= 5]  # Filtre les marchés avec peu de données
-        market_prices = market_prices.sort_values('mean', ascending=True).tail(15)
+        # Prix moyens par marché (index conservé : pas de copie reset_index)
+        market_prices = self._precompute()['by_market']
+        market_prices = market_prices.loc[market_prices['count'] >= 5]  # Filtre les marchés avec peu de données
+        market_prices = market_prices.nlargest(15, 'mean').sort_values('mean')
         
         fig = px.bar(
             market_prices,
             x='mean',
-            y='market_clean',
+            y=market_prices.index,
             orientation='h',
             title='Prix moyens par marché (Top 15)',
             labels={'mean': 'Prix moyen (€)', 'market_clean': 'Marché'},
@@ -138,8 +363,7 @@ class AgroDataVisualizer:
         
         fig.update_layout(height=600)
         
-        fig.write_html('static/plots/market_comparison.html')
-        fig.write_image('static/plots/market_comparison.png')
+        self._save_figure(fig, 'market_comparison')
         
         return fig
 
@@ -148,21 +372,19 @@ class AgroDataVisualizer:
         if self.df.empty or 'price' not in self.df.columns or 'origin' not in self.df.columns:
             return None
         
-        # Filtrer les données avec origine connue
-        origin_data = self.df[self.df['origin'].notna()]
+        # Prix moyens par origine (les origines inconnues sont exclues du groupby)
+        origin_prices = self._precompute()['by_origin']
         
-        if origin_data.empty:
+        if origin_prices.empty:
             return None
         
-        # Prix moyens par origine
-        origin_prices = origin_data.groupby('origin')['price'].agg(['mean', 'count']).reset_index()
-        origin_prices = origin_prices[origin_prices['count'] >= 3]  # Filtre les origines avec peu de données
-        origin_prices = origin_prices.sort_values('mean', ascending=True)
+        origin_prices = origin_prices.loc[origin_prices['count'] >= 3]  # Filtre les origines avec peu de données
+        origin_prices = origin_prices.sort_values('mean')
         
         fig = px.bar(
             origin_prices,
             x='mean',
-            y='origin',
+            y=origin_prices.index,
             orientation='h',
             title='Prix moyens par pays d\'origine',
             labels={'mean': 'Prix moyen (€)', 'origin': 'Origine'},
@@ -171,8 +393,7 @@ class AgroDataVisualizer:
         
         fig.update_layout(height=500)
         
-        fig.write_html('static/plots/origin_analysis.html')
-        fig.write_image('static/plots/origin_analysis.png')
+        self._save_figure(fig, 'origin_analysis')
         
         return fig
 
@@ -182,7 +403,7 @@ class AgroDataVisualizer:
             return None
         
         # Prix moyens par saison
-        seasonal_prices = self.df.groupby('season')['price'].agg(['mean', 'count', 'std']).reset_index()
+        seasonal_prices = self._precompute()['by_season']
         
         fig = make_subplots(
             rows=1, cols=2,
@@ -192,14 +413,14 @@ class AgroDataVisualizer:
         
         # Prix moyens
         fig.add_trace(
-            go.Bar(x=seasonal_prices['season'], y=seasonal_prices['mean'], 
+            go.Bar(x=seasonal_prices.index, y=seasonal_prices['mean'], 
                   name='Prix moyen', error_y=dict(type='data', array=seasonal_prices['std'])),
             row=1, col=1
         )
         
         # Nombre d'observations
         fig.add_trace(
-            go.Bar(x=seasonal_prices['season'], y=seasonal_prices['count'], 
+            go.Bar(x=seasonal_prices.index, y=seasonal_prices['count'], 
                   name='Nombre d\'observations'),
             row=1, col=2
         )
@@ -210,8 +431,7 @@ class AgroDataVisualizer:
             showlegend=False
         )
         
-        fig.write_html('static/plots/seasonal_analysis.html')
-        fig.write_image('static/plots/seasonal_analysis.png')
+        self._save_figure(fig, 'seasonal_analysis')
         
         return fig
 
@@ -221,25 +441,30 @@ class AgroDataVisualizer:
             return None
         
         # Sélection des produits et marchés les plus fréquents
-        top_products = self.df['product_clean'].value_counts().head(10).index
-        top_markets = self.df['market_clean'].value_counts().head(8).index
-        
-        # Filtre les données
-        filtered_df = self.df[
-            (self.df['product_clean'].isin(top_products)) & 
-            (self.df['market_clean'].isin(top_markets))
-        ]
-        
-        # Pivot table pour la heatmap
-        pivot_data = filtered_df.pivot_table(
-            values='price', 
-            index='product_clean', 
-            columns='market_clean', 
-            aggfunc='mean'
+        top_products = self._precompute()['top_products'].index
+        top_markets = self._precompute()['top_markets'].index
+        
+        # Filtre par tables de correspondance indexées par les codes des catégories, puis projection
+        # sur les trois colonnes utiles
+        mask = self._category_mask('product_clean', top_products) & self._category_mask('market_clean', top_markets)
+        filtered_df = self.df.loc[mask, ['price', 'product_clean', 'market_clean']]
+        
+        # Moyenne groupée sur les seuls couples observés, puis remise en grille
+        # (tri et suppression des lignes/colonnes vides identiques à pivot_table)
+        pivot_data = (
+            filtered_df.groupby(['product_clean', 'market_clean'], observed=True, sort=False)['price']
+            .mean()
+            .unstack('market_clean')
+            .sort_index()
+            .sort_index(axis=1)
+            .dropna(how='all')
+            .dropna(axis=1, how='all')
         )
         
         fig = px.imshow(
-            pivot_data,
+            np.ascontiguousarray(pivot_data.to_numpy()),
+            x=pivot_data.columns,
+            y=pivot_data.index,
             title='Heatmap des prix moyens par produit et marché',
             labels=dict(x="Marché", y="Produit", color="Prix moyen (€)"),
             template='plotly_white'
@@ -247,8 +472,7 @@ class AgroDataVisualizer:
         
         fig.update_layout(height=600)
         
-        fig.write_html('static/plots/product_heatmap.html')
-        fig.write_image('static/plots/product_heatmap.png')
+        self._save_figure(fig, 'product_heatmap')
         
         return fig
 
@@ -304,58 +528,131 @@ class AgroDataVisualizer:
             title_text="Tableau de bord - Statistiques générales"
         )
         
-        fig.write_html('static/plots/dashboard.html')
-        fig.write_image('static/plots/dashboard.png')
+        self._save_figure(fig, 'dashboard')
         
         return fig
 
-    def generate_all_plots(self):
-        """Génère tous les graphiques"""
-        plots = {}
-        
-        try:
-            plots['price_evolution'] = self.create_price_evolution_plot()
-            self.logger.info("Graphique d'évolution des prix créé")
-        except Exception as e:
-            self.logger.error(f"Erreur création graphique évolution: {e}")
-        
-        try:
-            plots['price_distribution'] = self.create_price_distribution_plot()
-            self.logger.info("Graphique de distribution des prix créé")
-        except Exception as e:
-            self.logger.error(f"Erreur création graphique distribution: {e}")
-        
-        try:
-            plots['market_comparison'] = self.create_market_comparison_plot()
-            self.logger.info("Graphique de comparaison des marchés créé")
-        except Exception as e:
-            self.logger.error(f"Erreur création graphique marchés: {e}")
-        
-        try:
-            plots['origin_analysis'] = self.create_origin_analysis_plot()
-            self.logger.info("Graphique d'analyse par origine créé")
-        except Exception as e:
-            self.logger.error(f"Erreur création graphique origine: {e}")
-        
-        try:
-            plots['seasonal_analysis'] = self.create_seasonal_analysis_plot()
-            self.logger.info("Graphique d'analyse saisonnière créé")
-        except Exception as e:
-            self.logger.error(f"Erreur création graphique saisonnier: {e}")
-        
+    def _outputs_exist(self, plots):
+        """Vérifie que les fichiers HTML (et PNG si activés) des graphiques créés sont toujours sur disque"""
+        extensions = ('html', 'png') if self.export_png else ('html',)
+        return all(os.path.exists(f'static/plots/{name}.{ext}')
+                   for name, fig in plots.items() if fig is not None for ext in extensions)
+
+    @staticmethod
+    def _copy_plots(plots):
+        """Copies des figures : l'appelant peut les modifier sans altérer celles mises en cache (None conservé)"""
+        return {name: go.Figure(fig) if fig is not None else None for name, fig in plots.items()}
+
+    def _use_process_pool(self):
+        """Pool de processus seulement sur demande, avec plusieurs cœurs et un gros volume de données"""
+        return self.parallel and (os.cpu_count() or 1) > 1 and len(self.df) >= PARALLEL_MIN_ROWS
+
+    def _build_plot(self, method_name):
+        """Construit un graphique ; les chemins HTML/PNG à écrire sont renvoyés au lieu d'être écrits"""
+        self._pending_html, self._pending_images = [], []
         try:
-            plots['product_heatmap'] = self.create_product_price_heatmap()
-            self.logger.info("Heatmap des produits créée")
-        except Exception as e:
-            self.logger.error(f"Erreur création heatmap: {e}")
-        
+            fig = getattr(self, method_name)()
+            return fig, list(self._pending_html), [path for _, path in self._pending_images]
+        finally:
+            self._pending_html, self._pending_images = None, None
+
+    def _iter_plot_results(self):
+        """Résultats (tâche, résultat, erreur) de chaque graphique, en série ou via le pool de processus"""
+        if not self._use_process_pool():
+            for task in PLOT_TASKS:
+                try:
+                    result, error = self._build_plot(task[1]), None
+                except Exception as e:
+                    result, error = None, e
+                yield task, result, error
+            return
+        
+        # Le visualiseur (données et agrégats) est transmis une seule fois à chaque processus
+        max_workers = min(len(PLOT_TASKS), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_plot_worker, initargs=(self,)) as executor:
+            futures = {executor.submit(_run_plot_task, task[1]): task for task in PLOT_TASKS}
+            for future in as_completed(futures):
+                try:
+                    result, error = future.result(), None
+                except Exception as e:
+                    result, error = None, e
+                yield futures[future], result, error
+
+    def generate_all_plots(self):
+        """Génère tous les graphiques (en parallèle si le pool de processus est activé)"""
+        # Données inchangées depuis le dernier appel : graphiques (HTML/PNG déjà écrits) réutilisés
         try:
-            plots['dashboard'] = self.create_dashboard_summary()
-            self.logger.info("Tableau de bord créé")
+            data_hash = self._data_hash()
         except Exception as e:
-            self.logger.error(f"Erreur création tableau de bord: {e}")
+            self.logger.warning(f"Empreinte des données indisponible: {e}")
+            data_hash = None
+        if data_hash is not None and data_hash == self._last_hash and self._last_plots is not None \
+                and self._outputs_exist(self._last_plots):
+            self.logger.info("Données inchangées, graphiques précédents réutilisés")
+            return self._copy_plots(self._last_plots)
+        self._last_hash, self._last_plots = None, None
         
-        return plots
+        plots = {}
+        pending = []
+        html_writes = []
+        self._precompute()
+        
+        # Les HTML sont écrits par des threads pendant que les graphiques suivants se construisent
+        with ThreadPoolExecutor(max_workers=2) as writer:
+            for (name, _, success_message, error_message), result, error in self._iter_plot_results():
+                if error is not None:
+                    self.logger.error(f"{error_message}: {error}")
+                    continue
+                fig, html_paths, png_paths = result
+                plots[name] = fig
+                html_writes.extend((writer.submit(fig.write_html, path), name, error_message) for path in html_paths)
+                pending.extend((fig, path) for path in png_paths)
+                self.logger.info(success_message)
+            
+            # Attente des écritures HTML : un graphique non sauvegardé est traité comme en erreur
+            for write, name, error_message in html_writes:
+                try:
+                    write.result()
+                except Exception as e:
+                    plots.pop(name, None)
+                    self.logger.error(f"{error_message}: {e}")
+        
+        # Export PNG groupé de tous les graphiques créés
+        self._export_images(pending)
+        
+        plots = {name: plots[name] for name, *_ in PLOT_TASKS if name in plots}
+        if data_hash is not None:
+            self._last_hash, self._last_plots = data_hash, plots
+        return self._copy_plots(plots)
+
+# Graphiques générés par generate_all_plots : clé, méthode, messages de succès et d'erreur
+PLOT_TASKS = [
+    ('price_evolution', 'create_price_evolution_plot',
+     "Graphique d'évolution des prix créé", "Erreur création graphique évolution"),
+    ('price_distribution', 'create_price_distribution_plot',
+     "Graphique de distribution des prix créé", "Erreur création graphique distribution"),
+    ('market_comparison', 'create_market_comparison_plot',
+     "Graphique de comparaison des marchés créé", "Erreur création graphique marchés"),
+    ('origin_analysis', 'create_origin_analysis_plot',
+     "Graphique d'analyse par origine créé", "Erreur création graphique origine"),
+    ('seasonal_analysis', 'create_seasonal_analysis_plot',
+     "Graphique d'analyse saisonnière créé", "Erreur création graphique saisonnier"),
+    ('product_heatmap', 'create_product_price_heatmap',
+     "Heatmap des produits créée", "Erreur création heatmap"),
+    ('dashboard', 'create_dashboard_summary',
+     "Tableau de bord créé", "Erreur création tableau de bord"),
+]
+
+_worker_visualizer = None
+
+def _init_plot_worker(visualizer):
+    """Installe le visualiseur partagé dans un processus de travail"""
+    global _worker_visualizer
+    _worker_visualizer = visualizer
+
+def _run_plot_task(method_name):
+    """Construit un graphique dans un processus de travail ; HTML et PNG sont écrits par le processus principal"""
+    return _worker_visualizer._build_plot(method_name)
 
 def main():
     visualizer = AgroDataVisualizer()
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from visualizations import AgroDataVisualizer
+
+
+def test_missing_column_plot_stays_none_after_cache_hit(tmp_path, monkeypatch):
+    """Un graphique non créé (colonne absente) reste None quand les graphiques précédents sont réutilisés"""
+    monkeypatch.chdir(tmp_path)
+    n = 60
+    pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=n).strftime('%Y-%m-%d'),
+        'price': [1.0 + i % 7 for i in range(n)],
+        'market_clean': ['Rungis', 'Lyon', 'Nice'] * (n // 3),
+        'product_clean': ['Tomate', 'Pomme'] * (n // 2),
+        'season': 'Hiver',
+        'price_category': '<2€',
+    }).to_csv('prices.csv', index=False)
+    
+    visualizer = AgroDataVisualizer('prices.csv')
+    first = visualizer.generate_all_plots()
+    second = visualizer.generate_all_plots()
+    
+    assert first['origin_analysis'] is None
+    assert second['origin_analysis'] is None
+    assert second['price_evolution'] is not None
+    assert not os.path.exists('static/plots/origin_analysis.html')